@@ -0,0 +1,4 @@
+"""Legacy shim; all project metadata lives in pyproject.toml."""
+from setuptools import setup
+
+setup()
@@ -6,7 +6,7 @@ redirector, output_formatting_agent) live in orchestration.py.
 This module contains supporting agents (RAG, validation, base classes).
 """
 
-from .rag import rag, retrieve_errors, get_vector_db
+from .rag import rag, retrieve_errors, get_vector_db, prewarm_vector_db
 from .base import BaseAgent, AgentResult
 from .validator import ValidationAgent, validate_output
 
@@ -15,6 +15,7 @@ __all__ = [
     "rag",
     "retrieve_errors",
     "get_vector_db",
+    "prewarm_vector_db",
     
     # Base
     "BaseAgent",
@@ -2,39 +2,21 @@
 RAG (Retrieval-Augmented Generation) agent for storing and retrieving error solutions.
 """
 
+import time
+
 from langchain_core.messages import ChatMessage
-from langchain_huggingface import HuggingFaceEmbeddings
-from langchain_community.vectorstores import Chroma
 from langchain.schema import Document
 from langgraph.types import Command
 
-
-# Lazy loading to avoid startup overhead
-_vector_db_instance = None
+from ..memory.rag_store import get_vector_db, prewarm_vector_db, get_error_probe_vector, buffer_rag_document
 
 
-def get_vector_db():
-    """
-    Lazy load the vector database only when needed.
-    This eliminates the startup delay from loading HuggingFaceEmbeddings and Chroma.
-    """
-    global _vector_db_instance
-    
-    if _vector_db_instance is None:
-        try:
-            print(">>> Initializing vector database (first use only)...")
-            embeddings = HuggingFaceEmbeddings(model_name="all-MiniLM-L6-v2")
-            _vector_db_instance = Chroma(
-                persist_directory="./rag_data", 
-                embedding_function=embeddings,
-                collection_name="agent_memories"
-            )
-            print(">>> Vector database initialized successfully.")
-        except Exception as e:
-            print(f"Error loading vector database: {str(e)}")
-            _vector_db_instance = None
-    
-    return _vector_db_instance
+# How many of the newest lessons to show per site. The read is bounded: only lessons
+# from the last LESSON_WINDOW_SECONDS, at most LESSON_SCAN_LIMIT per site, are fetched,
+# and sites left short are topped up by similarity to a fixed error probe.
+ERRORS_PER_SITE = 3
+LESSON_WINDOW_SECONDS = 30 * 24 * 3600
+LESSON_SCAN_LIMIT = 20
 
 
 def rag(state):
@@ -71,13 +53,12 @@ def rag(state):
             "url": url,
             "site_name": site_name,
             "task": task,
-            "agent": agent
+            "agent": agent,
+            "timestamp": time.time()
         }
     )
     
-    vector_db = get_vector_db()
-    if vector_db:
-        vector_db.add_documents([doc])
+    buffer_rag_document(doc)
     
     return Command(
         update={"messages": [ChatMessage(role="RAG Agent", content=f"Memory Saved: '{rag_content[:50]}...'")]},
@@ -103,26 +84,56 @@ def retrieve_errors(state):
     if not vector_db:
         return "Vector database not available."
 
-    combined_errors = "PAST ERRORS/LESSONS:\n"
-    found_any = False
-
-    for site in current_sites:
+    # Metadata-only read of each site's recent lessons (no query embedding, no HNSW
+    # walk). Chroma returns rows in insertion order, so sort the bounded read by
+    # timestamp and keep the newest.
+    sites = list(dict.fromkeys(current_sites))
+    since = time.time() - LESSON_WINDOW_SECONDS
+    by_site = {}
+    for site in sites:
+        docs = []
         try:
-            results = vector_db.similarity_search(
-                query="error failure issue fix", 
-                k=3, 
-                filter={"site_name": site} 
+            records = vector_db.get(
+                where={"$and": [{"site_name": site}, {"timestamp": {"$gte": since}}]},
+                limit=LESSON_SCAN_LIMIT,
+                include=["documents", "metadatas"]
             )
-            if results:
-                found_any = True
-                combined_errors += f"\n--- For {site} ---\n"
-                for i, doc in enumerate(results):
-                    prev_task = doc.metadata.get('task', 'General Task')
-                    combined_errors += f"{i+1}. [Task: {prev_task}]: {doc.page_content}\n"
+            docs = list(zip(records["documents"], records["metadatas"]))
         except Exception as e:
-            print(f"Error retrieving for {site}: {e}")
+            print(f"Error retrieving past errors for {site}: {e}")
+        docs.sort(key=lambda d: d[1].get("timestamp", 0.0), reverse=True)
+        del docs[ERRORS_PER_SITE:]
 
-    if not found_any:
+        # Too few recent lessons (older ones may predate timestamps): top up by similarity
+        probe = get_error_probe_vector()
+        if len(docs) < ERRORS_PER_SITE and probe is not None:
+            try:
+                results = vector_db.similarity_search_by_vector(
+                    embedding=probe,
+                    k=ERRORS_PER_SITE,
+                    filter={"site_name": site}
+                )
+            except Exception as e:
+                print(f"Error retrieving past errors for {site}: {e}")
+                results = []
+            for doc in results:
+                if len(docs) < ERRORS_PER_SITE and (doc.page_content, doc.metadata) not in docs:
+                    docs.append((doc.page_content, doc.metadata))
+        by_site[site] = docs
+
+    by_site = {site: docs for site, docs in by_site.items() if docs}
+
+    if not by_site:
         return "No previous errors found for these sites."
+
+    parts = ["PAST ERRORS/LESSONS:\n"]
+    for site in sites:
+        docs = by_site.get(site)
+        if not docs:
+            continue
+        parts.append(f"\n--- For {site} ---\n")
+        for i, (content, meta) in enumerate(docs):
+            prev_task = meta.get('task', 'General Task')
+            parts.append(f"{i+1}. [Task: {prev_task}]: {content}\n")
             
-    return combined_errors
+    return "".join(parts)
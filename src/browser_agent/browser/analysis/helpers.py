@@ -2,8 +2,32 @@
 Browser lifecycle and helper tools for analysis.
 """
 
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import Any, Callable, List, Optional, Tuple
+
 from langchain_core.tools import tool
+from playwright.sync_api import Page
 from ..manager import browser_manager
+from ...core.exceptions import AllKeysExhaustedError
+
+# Seconds a provider may stay silent before the next one in the rotation is started as
+# a hedge. Each hedge is a duplicate paid request, so the default (negative) disables
+# hedging: the next provider only starts after a rate limit / access error. 0 launches
+# every provider at once (lowest latency, highest token spend).
+LLM_RACE_STAGGER = float(os.getenv("LLM_RACE_STAGGER", "-1"))
+
+# Markdown is capped inside the page so oversized pages never cross CDP in full
+MARKDOWN_MAX_CHARS = 40000
+
+# Exact-match cache of successful LLM extractions, so re-running a tool on an
+# unchanged page skips the round-trip. Oldest entries are evicted first.
+LLM_CACHE_SIZE = int(os.getenv("LLM_CACHE_SIZE", "128"))
+_llm_cache: "OrderedDict[str, Any]" = OrderedDict()
+_llm_cache_lock = threading.Lock()
 
 
 @tool
@@ -50,20 +74,23 @@ def close_browser():
     return browser_manager.close_browser()
 
 
-def extract_html_code():
+def extract_html_code(page: Optional[Page] = None):
     """
     Extracts the HTML code from the current page and saves a screenshot.
     
+    Args:
+        page: Page to read; defaults to the browser manager's current page
+        
     Returns:
         HTML content as string, or None on error
     """
     try:
-        page = browser_manager.get_page()
-        page.wait_for_load_state("load", timeout=60000)
+        page = page or browser_manager.get_page()
         if not page:
             return "Error: No browser page is open"
+        page.wait_for_load_state("load", timeout=60000)
         
-        html_code = page.content()
+        html_code = browser_manager.get_cached_content() if page is browser_manager.get_page() else page.content()
         screenshot_path = "screenshot.png"
         page.screenshot(path=screenshot_path)
         return html_code
@@ -72,27 +99,61 @@ def extract_html_code():
         return None
 
 
-def extract_page_content_as_markdown() -> str:
+def extract_page_content_as_markdown(page: Optional[Page] = None) -> str:
     """
     Extracts the page content as clean Markdown.
     
     Uses JavaScript to traverse the DOM and convert visible elements to Markdown format.
     Skips hidden elements, scripts, styles, and SVGs.
     
+    Args:
+        page: Page to read; defaults to the browser manager's current page
+        
     Returns:
         Markdown-formatted page content (truncated to 40,000 chars)
     """
-    page = browser_manager.get_page()
+    page = page or browser_manager.get_page()
     if not page:
         return "Error: No page open"
 
     try:
         markdown = page.evaluate("""
-            () => {
-                function isVisible(el) {
-                    return !!(el.offsetWidth || el.offsetHeight || el.getClientRects().length);
+            (maxChars) => {
+                // Stop walking once roughly maxChars of text has been emitted
+                let budget = maxChars;
+                const SKIP_TAGS = new Set(['script', 'style', 'noscript', 'svg', 'path', 'head', 'meta']);
+                const KEEP_EMPTY_TAGS = new Set(['img', 'input', 'br', 'hr']);
+
+                // Read phase: collect visibility for every element in one TreeWalker pass
+                // (skipped subtrees are rejected wholesale) before any formatting work.
+                const visible = new Map();
+                const walker = document.createTreeWalker(document.body, NodeFilter.SHOW_ELEMENT, {
+                    acceptNode: (el) => SKIP_TAGS.has(el.tagName.toLowerCase())
+                        ? NodeFilter.FILTER_REJECT
+                        : NodeFilter.FILTER_ACCEPT
+                });
+                for (let el = walker.currentNode; el; el = walker.nextNode()) {
+                    visible.set(el, !!(el.offsetWidth || el.offsetHeight || el.getClientRects().length));
                 }
 
+                // Tag -> markdown formatter (one lookup per element instead of an if-chain)
+                const heading = (n, c) => `\\n\\n# ${c}\\n\\n`;
+                const subheading = (n, c) => `\\n\\n## ${c}\\n\\n`;
+                const block = (n, c) => `\\n${c}\\n`;
+                const FORMATTERS = {
+                    a: (n, c) => {
+                        const href = n.getAttribute('href');
+                        return href ? ` [${c}](${href}) ` : c;
+                    },
+                    img: (n, c) => ` ![${n.getAttribute('alt') || 'Image'}] `,
+                    h1: heading, h2: heading, h3: heading,
+                    h4: subheading, h5: subheading, h6: subheading,
+                    li: (n, c) => `\\n- ${c}`,
+                    p: block, div: block,
+                    button: (n, c) => ` [Button: ${c}] `,
+                    input: (n, c) => ` [Input: ${n.value || n.getAttribute('placeholder') || ''}] `,
+                };
+
                 function cleanText(text) {
                     return text.replace(/\\s+/g, ' ').trim();
                 }
@@ -102,69 +163,141 @@ def extract_page_content_as_markdown() -> str:
                     
                     // Handle Text Nodes
                     if (node.nodeType === 3) {
-                        return cleanText(node.textContent);
+                        if (budget <= 0) return "";
+                        const text = cleanText(node.textContent);
+                        budget -= text.length;
+                        return text;
                     }
                     
                     // Handle Elements
                     if (node.nodeType === 1) {
-                        if (!isVisible(node)) return "";
+                        // Hidden elements and skipped tags (script/style/noscript/...) are not visible
+                        if (!visible.get(node)) return "";
                         
                         const tag = node.tagName.toLowerCase();
-                        
-                        // Skip script/style/noscript
-                        if (['script', 'style', 'noscript', 'svg', 'path', 'head', 'meta'].includes(tag)) {
-                            return "";
-                        }
 
                         // Process children first
                         let childrenText = "";
-                        node.childNodes.forEach(child => {
+                        for (const child of node.childNodes) {
+                            if (budget <= 0) break;
                             childrenText += traverse(child) + " ";
-                        });
+                        }
                         childrenText = childrenText.replace(/\\s+/g, ' ').trim();
 
-                        if (!childrenText && !['img', 'input', 'br', 'hr'].includes(tag)) return "";
+                        if (!childrenText && !KEEP_EMPTY_TAGS.has(tag)) return "";
 
                         // Format based on Tag
-                        if (tag === 'a') {
-                            const href = node.getAttribute('href');
-                            return href ? ` [${childrenText}](${href}) ` : childrenText;
-                        }
-                        if (tag === 'img') {
-                            const alt = node.getAttribute('alt') || 'Image';
-                            return ` ![${alt}] `;
-                        }
-                        if (['h1', 'h2', 'h3'].includes(tag)) {
-                            return `\\n\\n# ${childrenText}\\n\\n`;
-                        }
-                        if (['h4', 'h5', 'h6'].includes(tag)) {
-                            return `\\n\\n## ${childrenText}\\n\\n`;
-                        }
-                        if (tag === 'li') {
-                            return `\\n- ${childrenText}`;
-                        }
-                        if (tag === 'p' || tag === 'div') {
-                            return `\\n${childrenText}\\n`;
-                        }
-                        if (tag === 'button') {
-                            return ` [Button: ${childrenText}] `;
-                        }
-                        if (tag === 'input') {
-                            const val = node.value || node.getAttribute('placeholder') || '';
-                            return ` [Input: ${val}] `;
-                        }
-                        
-                        return childrenText + " ";
+                        const format = FORMATTERS[tag];
+                        return format ? format(node, childrenText) : childrenText + " ";
                     }
                     return "";
                 }
 
-                return traverse(document.body);
+                return traverse(document.body).slice(0, maxChars);
             }
-        """)
+        """, MARKDOWN_MAX_CHARS)
         
-        # Truncate to 40,000 chars to avoid token limits
-        return markdown[:40000]
+        return markdown
 
     except Exception as e:
         return f"Error extracting markdown: {e}"
+
+
+def race_llm_rotation(
+    llm_rotation: List[Tuple[str, Any]],
+    call: Callable[[str, Any], Any],
+    is_retryable: Callable[[Exception], bool],
+    stagger: float = None,
+) -> Tuple[str, Any]:
+    """
+    Run call(model_name, llm) across the rotation concurrently and return the first success.
+
+    The next provider is launched as soon as a running one fails with a retryable
+    (rate limit / access) error, and, if `stagger` is positive, when the running ones
+    have been silent for `stagger` seconds. Only use this for idempotent text generation.
+
+    Returns:
+        (model_name, result) from the first provider to succeed
+
+    Raises:
+        The first non-retryable exception raised by a provider, once no other
+        provider still running can succeed
+        AllKeysExhaustedError if every provider failed with a retryable error
+    """
+    if stagger is None:
+        stagger = LLM_RACE_STAGGER
+
+    candidates = iter(llm_rotation)
+    pending = {}
+    fatal: Optional[Exception] = None
+    pool = ThreadPoolExecutor(max_workers=max(1, len(llm_rotation)))
+
+    def launch() -> bool:
+        if fatal is not None:
+            # Sequential rotation would have stopped here, so start nothing new
+            return False
+        entry = next(candidates, None)
+        if entry is None:
+            return False
+        model_name, llm = entry
+        pending[pool.submit(call, model_name, llm)] = model_name
+        return True
+
+    try:
+        launch()
+        if stagger == 0:
+            while launch():
+                pass
+
+        while pending:
+            done, _ = wait(pending, timeout=stagger if stagger > 0 else None, return_when=FIRST_COMPLETED)
+            if not done:
+                # Current providers are slow: hedge with the next one
+                launch()
+                continue
+            for future in done:
+                model_name = pending.pop(future)
+                try:
+                    return model_name, future.result()
+                except Exception as e:
+                    if not is_retryable(e):
+                        # An earlier provider may still answer; raise only if none does
+                        fatal = fatal or e
+                        continue
+                    print(f">>> [WARN] Rate limit / access error on {model_name}, rotating to next key...")
+                    launch()
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    if fatal is not None:
+        raise fatal
+    raise AllKeysExhaustedError("All API keys exhausted due to rate limits")
+
+
+def llm_cache_key(*parts) -> str:
+    """blake2b digest over the prompt parts (str or bytes) that determine an LLM response."""
+    digest = hashlib.blake2b(digest_size=16)
+    for part in parts:
+        digest.update(part if isinstance(part, bytes) else str(part).encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+def llm_cache_get(key: str) -> Optional[Any]:
+    """Return the cached response for key (marking it recently used), or None."""
+    with _llm_cache_lock:
+        if key not in _llm_cache:
+            return None
+        _llm_cache.move_to_end(key)
+        return _llm_cache[key]
+
+
+def llm_cache_put(key: str, value: Any) -> None:
+    """Store a successful response, evicting the least recently used entry when full."""
+    if LLM_CACHE_SIZE <= 0:
+        return
+    with _llm_cache_lock:
+        _llm_cache[key] = value
+        _llm_cache.move_to_end(key)
+        while len(_llm_cache) > LLM_CACHE_SIZE:
+            _llm_cache.popitem(last=False)
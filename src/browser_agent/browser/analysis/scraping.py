@@ -6,7 +6,20 @@ from langchain_core.tools import tool
 
 from ...llm import LLMConfig
 from ...core import extract_json_from_markdown
-from .helpers import extract_page_content_as_markdown
+from ...core.exceptions import AllKeysExhaustedError
+from ..manager import browser_manager
+from .helpers import (
+    extract_page_content_as_markdown,
+    race_llm_rotation,
+    llm_cache_key,
+    llm_cache_get,
+    llm_cache_put,
+)
+
+
+def _is_retryable(e: Exception) -> bool:
+    error_str = str(e).lower()
+    return "429" in error_str or "403" in error_str or "rate limit" in error_str or "quota" in error_str or "resource_exhausted" in error_str or "permission" in error_str or "denied" in error_str or "billing" in error_str
 
 
 @tool
@@ -35,14 +48,11 @@ def scrape_data_using_text(requirements: str, provider: str = None):
         }
     """
     # Extract page content as markdown
-    content = extract_page_content_as_markdown()
+    content = extract_page_content_as_markdown(browser_manager.get_page())
     
     if "Error" in content:
         return {"error": content}
 
-    # Get LLM rotation with optional provider filter
-    llm_rotation = LLMConfig.get_main_llm_with_rotation(0, provider=provider)
-
     prompt = f"""
     You are a Data Extraction Agent.
     
@@ -65,28 +75,31 @@ def scrape_data_using_text(requirements: str, provider: str = None):
       "count": N
     }}
     """
+
+    # Identical prompt on an unchanged page: reuse the previous extraction
+    cache_key = llm_cache_key("scrape", provider, prompt)
+    cached = llm_cache_get(cache_key)
+    if cached is not None:
+        print(">>> [OK] Reusing cached extraction for unchanged page")
+        return cached
+
+    # Get LLM rotation with optional provider filter
+    llm_rotation = LLMConfig.get_main_llm_with_rotation(0, provider=provider)
     
-    # Try each LLM in rotation
-    for idx, (model_name, llm) in enumerate(llm_rotation):
-        try:
-            print(f"\n>>> scrape_data_using_text trying {model_name}...")
-            
-            response = llm.invoke(prompt)
-            result = extract_json_from_markdown(response.content)
-            
-            print(f">>> [OK] Successfully scraped data with {model_name}")
-            return result
-            
-        except Exception as e:
-            error_str = str(e).lower()
-            
-            # Check if it's a retryable error (rate limit, permission, billing)
-            if "429" in error_str or "403" in error_str or "rate limit" in error_str or "quota" in error_str or "resource_exhausted" in error_str or "permission" in error_str or "denied" in error_str or "billing" in error_str:
-                print(f">>> [WARN] Rate limit / access error on {model_name}, rotating to next key...")
-                continue  # Try next LLM
-            else:
-                print(f">>> LLM Extraction failed: {e}")
-                return {"error": f"LLM Extraction failed: {e}"}
-    
-    # All keys exhausted
-    return {"error": "All API keys exhausted due to rate limits"}
+    def _extract(model_name, llm):
+        print(f"\n>>> scrape_data_using_text trying {model_name}...")
+        response = llm.invoke(prompt)
+        return extract_json_from_markdown(response.content)
+
+    # Race the rotation; a retryable error (rate limit, permission, billing) moves on to the next LLM
+    try:
+        model_name, result = race_llm_rotation(llm_rotation, _extract, _is_retryable)
+    except AllKeysExhaustedError:
+        return {"error": "All API keys exhausted due to rate limits"}
+    except Exception as e:
+        print(f">>> LLM Extraction failed: {e}")
+        return {"error": f"LLM Extraction failed: {e}"}
+
+    print(f">>> [OK] Successfully scraped data with {model_name}")
+    llm_cache_put(cache_key, result)
+    return result
@@ -3,10 +3,46 @@ Selector extraction strategy using code analysis.
 """
 
 from langchain_core.tools import tool
+
+try:
+    from selectolax.parser import HTMLParser
+    HAS_SELECTOLAX = True
+except ImportError:
+    from bs4 import BeautifulSoup, Comment
+    HAS_SELECTOLAX = False
 from ...llm import LLMConfig
 from ...core import build_attributes_model
 from ...prompts import get_code_analysis_prompt
+from ...core.exceptions import AllKeysExhaustedError
 from ..manager import browser_manager
+from .helpers import race_llm_rotation
+
+
+# Tags that never carry selectable UI but dominate raw page HTML
+_NOISE_TAGS = ["script", "style", "svg", "noscript", "iframe", "link", "meta"]
+
+
+def _strip_html_noise(html_code: str) -> str:
+    """
+    Drop scripts, styles, inline SVGs and other non-UI markup before the HTML is sent
+    to the LLM. Uses selectolax (Lexbor) when installed, BeautifulSoup otherwise.
+    """
+    if HAS_SELECTOLAX:
+        tree = HTMLParser(html_code)
+        tree.strip_tags(_NOISE_TAGS)
+        return tree.body.html if tree.body is not None else tree.html
+
+    soup = BeautifulSoup(html_code, "html.parser")
+    for node in soup(_NOISE_TAGS):
+        node.decompose()
+    for comment in soup.find_all(string=lambda text: isinstance(text, Comment)):
+        comment.extract()
+    return str(soup.body or soup)
+
+
+def _is_rate_limit(e: Exception) -> bool:
+    error_str = str(e).lower()
+    return "429" in error_str or "rate limit" in error_str or "quota" in error_str or "resource_exhausted" in error_str
 
 
 @tool
@@ -36,53 +72,43 @@ def extract_and_analyze_selectors(requirements: list[str], provider: str = None)
         
         page.wait_for_load_state("load", timeout=60000)
         
-        html_code = page.content()
+        html_code = _strip_html_noise(browser_manager.get_cached_content())
             
         requirements_text = "\n".join(requirements)
         
         # Get LLM rotation list with optional provider filter
         llm_rotation = LLMConfig.get_main_llm_with_rotation(0, provider=provider)
         
-        # Try each LLM in rotation until success or all exhausted
-        for idx, (model_name, llm) in enumerate(llm_rotation):
-            try:
-                print(f"\n>>> extract_and_analyze_selectors trying {model_name}...")
-                
-                prompt = get_code_analysis_prompt(requirements_text, html_code)
-                
-                # Use structured output with dynamically built model
-                structured_llm = llm.with_structured_output(
-                    build_attributes_model("Element_Properties", requirements)
-                )
-                response = structured_llm.invoke(prompt)
-                
-                print(f">>> Successfully extracted selectors with {model_name}")
-                
-                # Clean response: fallback to text-based selector if LLM returned placeholder
-                clean_response = {}
-                for key, val in response.dict().items():
-                    sel = val.get('playwright_selector', '')
-                    if "sample" in sel.lower() or len(sel) < 2:
-                        print(f"Bad selector for {key}, attempting generic fallback")
-                        clean_response[key] = f"text={key}"  # Fallback to text selector
-                    else:
-                        clean_response[key] = val
-            
-                return clean_response
-                
-            except Exception as e:
-                error_str = str(e).lower()
-                
-                # Check if it's a rate limit error
-                if "429" in error_str or "rate limit" in error_str or "quota" in error_str or "resource_exhausted" in error_str:
-                    print(f">>> [WARN] Rate limit hit on {model_name}, rotating to next key...")
-                    continue  # Try next LLM
-                else:
-                    print(f">>> Error in selector extraction: {error_str}")
-                    return {"error": f"Extraction failed: {str(e)}"}
+        prompt = get_code_analysis_prompt(requirements_text, html_code)
+        output_model = build_attributes_model("Element_Properties", requirements)
+
+        def _extract(model_name, llm):
+            print(f"\n>>> extract_and_analyze_selectors trying {model_name}...")
+            # Use structured output with dynamically built model
+            return llm.with_structured_output(output_model).invoke(prompt)
+
+        # Race the rotation; rate limit errors move on to the next LLM
+        try:
+            model_name, response = race_llm_rotation(llm_rotation, _extract, _is_rate_limit)
+        except AllKeysExhaustedError:
+            return {"error": "All API keys exhausted due to rate limits"}
+        except Exception as e:
+            print(f">>> Error in selector extraction: {str(e).lower()}")
+            return {"error": f"Extraction failed: {str(e)}"}
+
+        print(f">>> Successfully extracted selectors with {model_name}")
         
-        # All keys exhausted
-        return {"error": "All API keys exhausted due to rate limits"}
+        # Clean response: fallback to text-based selector if LLM returned placeholder
+        clean_response = {}
+        for key, val in response.dict().items():
+            sel = val.get('playwright_selector', '')
+            if "sample" in sel.lower() or len(sel) < 2:
+                print(f"Bad selector for {key}, attempting generic fallback")
+                clean_response[key] = f"text={key}"  # Fallback to text selector
+            else:
+                clean_response[key] = val
+    
+        return clean_response
         
     except Exception as e:
         error = f"Error in extract_and_analyze_selectors: {str(e)}"
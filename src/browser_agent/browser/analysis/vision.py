@@ -2,15 +2,50 @@
 Vision-based analysis strategy using screenshots and vision LLMs.
 """
 
-import os
-import base64
+from concurrent.futures import ThreadPoolExecutor
 from typing import Optional, Literal
+from langchain_core.messages import HumanMessage
 from langchain_core.tools import tool
+from playwright.sync_api import TimeoutError as PlaywrightTimeoutError
+
+# SIMD-accelerated drop-in for the stdlib encoder, if installed
+try:
+    import pybase64 as base64
+except ImportError:
+    import base64
 
 from ...llm import LLMConfig
 from ...prompts import get_vision_analysis_prompt
 from ...core import extract_json_from_markdown
+from ...core.exceptions import AllKeysExhaustedError
 from ..manager import browser_manager
+from .helpers import race_llm_rotation, llm_cache_key, llm_cache_get, llm_cache_put
+
+def _is_retryable(e: Exception) -> bool:
+    error_str = str(e).lower()
+    return "429" in error_str or "403" in error_str or "rate limit" in error_str or "quota" in error_str or "resource_exhausted" in error_str or "permission" in error_str or "denied" in error_str or "billing" in error_str
+
+
+# Frames (polled per animation frame) after which an unmoved scrollY counts as settled:
+# pages that scroll an inner container never move the window at all
+SCROLL_IDLE_FRAMES = 24
+
+# Resets the frame counter and returns scrollY, taken just before each wheel scroll
+_SCROLL_START_JS = "() => { window.__aiScrollFrames = 0; return window.scrollY; }"
+
+# True once scrollY has moved off start_y and held still for a frame, the bottom is
+# reached, or scrollY has not moved at all for SCROLL_IDLE_FRAMES frames
+_SCROLL_SETTLED_JS = """
+([startY, idleFrames]) => {
+    const y = window.scrollY;
+    const atBottom = window.innerHeight + y >= document.documentElement.scrollHeight - 1;
+    const frames = window.__aiScrollFrames = (window.__aiScrollFrames || 0) + 1;
+    const settled = (y !== startY && y === window.__aiLastScrollY) || atBottom
+        || (y === startY && frames >= idleFrames);
+    window.__aiLastScrollY = y;
+    return settled;
+}
+"""
 
 
 @tool
@@ -49,60 +84,43 @@ def analyze_using_vision(
         JSON response from vision LLM or {"error": "..."} on failure
     """
     page = browser_manager.get_page()
+    if not page:
+        return {"error": "No browser page is open"}
     page.wait_for_load_state("load", timeout=60000)
     
-    screenshot_paths = []
+    screenshots = []
     
-    # Take 5 screenshots while scrolling down
+    # Take 5 screenshots while scrolling down (kept in memory, never written to disk).
+    # Lossy JPEG is plenty for vision models and is several times smaller than PNG.
     try:
         for i in range(5):
-            path = f"screenshot_{i}.png"
-            page.screenshot(path=path)
-            screenshot_paths.append(path)
+            screenshots.append(page.screenshot(type="jpeg", quality=70, full_page=False))
             
+            start_y = page.evaluate(_SCROLL_START_JS)
             page.mouse.wheel(0, 700)
-            page.wait_for_timeout(800)  # Wait for scroll animation to render
+            # Wait only until the scroll has actually settled (or the page can't scroll further)
+            try:
+                page.wait_for_function(_SCROLL_SETTLED_JS, arg=[start_y, SCROLL_IDLE_FRAMES], timeout=2000)
+            except PlaywrightTimeoutError:
+                pass
             
     except Exception as e:
         print(f"Error extracting screenshots: {str(e)}")
-        
-        # Cleanup on error
-        for p in screenshot_paths:
-            if os.path.exists(p):
-                try:
-                    os.remove(p)
-                except:
-                    pass
         return {"error": f"Screenshot error: {str(e)}"}
     
-    # Encode screenshots as base64 for LLM
-    image_contents = []
+    # Encode screenshots as base64 for LLM (scrolling must stay sequential, encoding need not)
     try:
-        for path in screenshot_paths:
-            with open(path, "rb") as f:
-                img_b64 = base64.b64encode(f.read()).decode("utf-8")
-            
-            mime_type = "image/png"
-            img_url = f"data:{mime_type};base64,{img_b64}"
-            image_contents.append({"type": "image_url", "image_url": {"url": img_url}})
-            
+        with ThreadPoolExecutor(max_workers=len(screenshots)) as pool:
+            encoded = list(pool.map(base64.b64encode, screenshots))
     except Exception as e:
         print(f"Error encoding screenshots: {str(e)}")
-        for p in screenshot_paths:
-            if os.path.exists(p):
-                try:
-                    os.remove(p)
-                except:
-                    pass
         return {"error": f"Encoding error: {str(e)}"}
-    finally:
-        # Always cleanup screenshot files
-        for p in screenshot_paths:
-            if os.path.exists(p):
-                try:
-                    os.remove(p)
-                except:
-                    pass
+    
+    mime_type = "image/jpeg"
+    image_contents = [
+        {"type": "image_url", "image_url": {"url": f"data:{mime_type};base64,{img_b64.decode('utf-8')}"}}
+        for img_b64 in encoded
+    ]
 
     # Build vision prompt
     img_width, img_height = 1920, 1080  # Standard desktop resolution
@@ -116,37 +134,34 @@ def analyze_using_vision(
     except:
         pass
 
+    # Same prompt over identical screenshots: reuse the previous analysis
+    cache_key = llm_cache_key("vision", prompt, *screenshots)
+    cached = llm_cache_get(cache_key)
+    if cached is not None:
+        print(">>> [OK] Reusing cached vision analysis for unchanged page")
+        return cached
+
     # Get vision LLM rotation (Ollama first, then Groq)
     llm_rotation = LLMConfig.get_vision_llm_with_rotation(0)
     
-    # Try each vision LLM in rotation
-    for idx, (model_name, llm) in enumerate(llm_rotation):
-        try:
-            print(f"\n>>> analyze_using_vision trying {model_name}...")
-            
-            # Message format: text prompt + N images
-            content_block = [{"type": "text", "text": prompt}] + image_contents
-            
-            messages = [
-                {"role": "user", "content": content_block},
-            ]
-            
-            response = llm.invoke(messages)
-            json_response = extract_json_from_markdown(response.content)
-            
-            print(f">>> [OK] Successfully analyzed vision with {model_name}")
-            return json_response
-            
-        except Exception as e:
-            error_str = str(e).lower()
-            
-            # Check if it's a rate limit error
-            if "429" in error_str or "403" in error_str or "rate limit" in error_str or "quota" in error_str or "resource_exhausted" in error_str or "permission" in error_str or "denied" in error_str or "billing" in error_str:
-                print(f">>> [WARN] Rate limit hit on {model_name}, rotating to next key...")
-                continue  # Try next LLM
-            else:
-                print(f">>> Error in vision analysis: {str(e)}")
-                return {"error": f"Vision analysis failed: {str(e)}"}
-    
-    # All vision keys exhausted
-    return {"error": "All vision API keys exhausted due to rate limits"}
+    # Message format: text prompt + N images. Built as a HumanMessage once so rotation
+    # retries reuse it instead of re-coercing the multi-megabyte payload per provider.
+    messages = [HumanMessage(content=[{"type": "text", "text": prompt}] + image_contents)]
+
+    def _analyze(model_name, llm):
+        print(f"\n>>> analyze_using_vision trying {model_name}...")
+        response = llm.invoke(messages)
+        return extract_json_from_markdown(response.content)
+
+    # Race the vision rotation; rate limit / access errors move on to the next LLM
+    try:
+        model_name, json_response = race_llm_rotation(llm_rotation, _analyze, _is_retryable)
+    except AllKeysExhaustedError:
+        return {"error": "All vision API keys exhausted due to rate limits"}
+    except Exception as e:
+        print(f">>> Error in vision analysis: {str(e)}")
+        return {"error": f"Vision analysis failed: {str(e)}"}
+
+    print(f">>> [OK] Successfully analyzed vision with {model_name}")
+    llm_cache_put(cache_key, json_response)
+    return json_response
@@ -1,22 +1,109 @@
 # BrowserManager - Singleton browser instance management
 from socket import timeout
 from sys import _current_exceptions
-from playwright.sync_api import sync_playwright, Page, BrowserContext
+from playwright.sync_api import sync_playwright, Browser, Page, BrowserContext, Locator
+from playwright.sync_api import TimeoutError as PlaywrightTimeoutError
 from playwright_stealth import Stealth
 from typing import Optional
+import atexit
 import os
+import re
+import threading
+from functools import lru_cache
 from browser_agent.observability.logger import get_logger
+from browser_agent.browser.scripts import PAGE_INIT_SCRIPT
 
 _logger = get_logger("BrowserManager")
 
+# Switch sites without relaunching Chromium: the first site keeps its persistent profile,
+# later sites open a new context restored from ./profiles/<site>.json (cookies and
+# localStorage). Opt-in: it bypasses the per-site profile directory after the first site.
+REUSE_CONTEXT = os.getenv("BROWSER_REUSE_CONTEXT", "false").lower() in ("1", "true", "yes")
+
+# Shared by the persistent launch and the per-site contexts opened on a site switch
+_LAUNCH_ARGS = [
+    "--start-maximized",
+    "--no-sandbox",
+    "--disable-blink-features=AutomationControlled",
+    "--disable-infobars",
+    "--disable-dev-shm-usage",
+    "--restore-last-session=false",
+    "--disable-session-crashed-bubble",
+]
+_CONTEXT_OPTIONS = dict(
+    user_agent=(
+        "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
+        "AppleWebKit/537.36 (KHTML, like Gecko) "
+        "Chrome/131.0.0.0 Safari/537.36"
+    ),
+    viewport=None,
+    locale="en-US",
+    timezone_id="America/New_York",
+    ignore_https_errors=True,
+)
+
+# Anything but letters, digits, '-' and '_' is dropped from site names (used in profile paths)
+_UNSAFE_SITE_CHARS = re.compile(r"[^\w-]")
+
+# Navigation returns once the server responds ("commit"). A slow first response gets
+# one longer retry (same 60s worst case as before); DOMContentLoaded is then awaited
+# only briefly, since tools wait on the specific elements they need.
+NAV_COMMIT_TIMEOUTS = (15000, 45000)
+NAV_DOM_TIMEOUT = 5000
+
+# Subresources the agent never reads, matched by URL pattern so only blocked requests
+# reach Python. Opt-in: while any route is registered Playwright disables the browser's
+# HTTP cache, so every page load refetches its scripts and stylesheets. That usually
+# costs more than skipping media and analytics saves, except on media-heavy sites.
+BLOCK_RESOURCES = os.getenv("BROWSER_BLOCK_RESOURCES", "false").lower() in ("1", "true", "yes")
+# Images and (icon) fonts show up in vision screenshots, so they are only blocked on request
+BLOCK_IMAGES = os.getenv("BROWSER_BLOCK_IMAGES", "false").lower() in ("1", "true", "yes")
+_MEDIA_AND_TRACKERS = (
+    r"\.(?:mp4|webm|m4v|mov|mp3|m4a|ogg|wav)(?:[?#]|$)"
+    r"|google-analytics\.com|googletagmanager\.com|doubleclick\.net|connect\.facebook\.net|hotjar\.com"
+)
+_IMAGES_AND_FONTS = r"\.(?:png|jpe?g|gif|webp|avif|bmp|ico|woff2?|ttf|otf|eot)(?:[?#]|$)"
+
+# Installs (once per document) a MutationObserver that counts DOM changes, and
+# returns the count. Cheap to evaluate compared to serializing the whole DOM.
+_DOM_VERSION_JS = """
+() => {
+    if (window.__aiDomVersion === undefined) {
+        window.__aiDomVersion = 0;
+        new MutationObserver(() => { window.__aiDomVersion++; }).observe(document, {
+            subtree: true, childList: true, attributes: true, characterData: true
+        });
+    }
+    return window.__aiDomVersion;
+}
+"""
+
+@lru_cache(maxsize=512)
+def _som_selector(element_id: int) -> str:
+    """CSS selector for a Set-of-Marks ID; IDs are coerced to int so a bad value can't form a selector."""
+    return f'[data-ai-id="{int(element_id)}"]'
+
+
 class BrowserManager:
     """Singleton class to manage browser and page instances globally."""
     _instance = None
     _playwright = None
+    _playwright_thread : Optional[int] = None
     _browser : Optional[BrowserContext] = None
     _page : Optional[Page] = None
+    _home_context : Optional[BrowserContext] = None
+    _home_page : Optional[Page] = None
+    _home_site : Optional[str] = None
+    _guest_browser : Optional[Browser] = None
     _current_site_name : Optional[str] = None
     _headless_mode : bool = False
+    _block_resources : bool = BLOCK_RESOURCES
+    _block_images : bool = BLOCK_IMAGES
+    _block_pattern : Optional[re.Pattern] = None
+    _profile_dirs : dict = {}
+    _nav_count : int = 0
+    _content_cache : Optional[tuple] = None
+    _locator_cache : dict = {}
 
     def set_headless_mode(self, mode: bool):
         """Sets the headless mode for the NEXT browser launch."""
@@ -37,62 +124,39 @@ class BrowserManager:
         """
         _logger.info(f"Starting browser for '{site_name}' -> {url}", agent="Browser")
         try:
-            safe_site_name = "".join([c for c in site_name if c.isalnum() or c in ('-','_',)]).strip()
-            if not safe_site_name: safe_site_name = "default"
+            safe_site_name = _UNSAFE_SITE_CHARS.sub("", site_name) or "default"
             
             if self._browser and self._current_site_name != safe_site_name:
                 print(f">>> Switching Context: {self._current_site_name} -> {safe_site_name}")
-                self.close_browser()
+                if not (REUSE_CONTEXT and self._switch_site_context(safe_site_name)):
+                    self.close_browser()
             
             if self._page and not self._page.is_closed():
                 _logger.debug(f"Navigating existing {safe_site_name} session to {url}", agent="Browser")
                 print(f">>> Navigate Existing {safe_site_name} session to {url}")
                 try:
-                    self._page.goto(url, wait_until="domcontentloaded", timeout = 60000)
+                    self._navigate(url)
                     return f"Navigated to {url}"
                 except Exception as e:
                     print(f"Navigation failed ({e}), restarting the browser...")
                     self.close_browser()
-            user_data_dir = os.path.abspath(f"./profiles/{safe_site_name}_profile")
-            if not os.path.exists(user_data_dir):
-                os.makedirs(user_data_dir)
-            
-            if not self._playwright:
-                self._playwright = sync_playwright().start()
+            user_data_dir = self._profile_dir(safe_site_name)
+            self._ensure_playwright()
 
             print(f">>> Launching new browser profiles: {safe_site_name}")
             self._browser = self._playwright.chromium.launch_persistent_context(
                 user_data_dir = user_data_dir,
                 headless = self._headless_mode,
-                user_agent=(
-                    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
-                    "AppleWebKit/537.36 (KHTML, like Gecko) "
-                    "Chrome/131.0.0.0 Safari/537.36"
-                ),
-                args=[
-                    "--start-maximized",
-                    "--no-sandbox",
-                    "--disable-blink-features=AutomationControlled",
-                    "--disable-infobars",
-                    "--disable-dev-shm-usage",
-                ],
-                viewport = None,
-                locale="en-US",
-                timezone_id="America/New_York",
-                ignore_https_errors=True,
+                args=_LAUNCH_ARGS,
+                **_CONTEXT_OPTIONS,
             )
 
             self._current_site_name = safe_site_name
             self._page = self._browser.pages[0]
+            self._home_context, self._home_page, self._home_site = self._browser, self._page, safe_site_name
+            self._prepare_context(self._browser, self._page)
 
-            # ── Apply Stealth Mode ──
-            # Patches navigator.webdriver, chrome.runtime, plugin arrays,
-            # languages, WebGL vendor, and other fingerprint vectors.
-            _stealth = Stealth()
-            _stealth.use_sync(self._browser)
-            _logger.info("Stealth mode applied", agent="Browser")
-
-            self._page.goto(url, wait_until="domcontentloaded", timeout=60000)
+            self._navigate(url)
 
             _logger.info(f"Browser launched for '{safe_site_name}' -> {url}", agent="Browser")
             return f"Browser started for {safe_site_name}"
@@ -102,10 +166,143 @@ class BrowserManager:
             self.close_browser()
             return f"Error opening browser: {str(e)}"
 
+    def _ensure_playwright(self):
+        # The Playwright driver outlives close_browser() so site switches don't respawn it.
+        # Sync Playwright is bound to the thread that started it, so only reuse it there.
+        if self._playwright and self._playwright_thread != threading.get_ident():
+            self._playwright = None
+            self._guest_browser = None
+        if not self._playwright:
+            self._playwright = sync_playwright().start()
+            self._playwright_thread = threading.get_ident()
+
+    def _prepare_context(self, context: BrowserContext, page: Page):
+        """Stealth, page scripts, resource blocking and navigation tracking for a fresh context."""
+        page.on("framenavigated", self._on_frame_navigated)
+        page.on("load", self._on_page_load)
+
+        # ── Apply Stealth Mode ──
+        # Patches navigator.webdriver, chrome.runtime, plugin arrays,
+        # languages, WebGL vendor, and other fingerprint vectors.
+        _stealth = Stealth()
+        _stealth.use_sync(context)
+        _logger.info("Stealth mode applied", agent="Browser")
+
+        # Compile the tools' page scripts once per document instead of per call
+        context.add_init_script(PAGE_INIT_SCRIPT)
+        self._apply_resource_blocking()
+
+    def _profile_dir(self, site_name: str) -> str:
+        """Absolute profile directory for site_name, resolved and created once per process."""
+        path = self._profile_dirs.get(site_name)
+        if path is None:
+            path = os.path.abspath(f"./profiles/{site_name}_profile")
+            os.makedirs(path, exist_ok=True)
+            self._profile_dirs[site_name] = path
+        return path
+
+    def _navigate(self, url: str):
+        """Navigates the current page, returning at commit plus a bounded DOMContentLoaded wait."""
+        for attempt, timeout in enumerate(NAV_COMMIT_TIMEOUTS):
+            try:
+                self._page.goto(url, wait_until="commit", timeout=timeout)
+                break
+            except PlaywrightTimeoutError:
+                if attempt == len(NAV_COMMIT_TIMEOUTS) - 1:
+                    raise
+                _logger.warning(f"No response from {url} after {timeout}ms, retrying", agent="Browser")
+        try:
+            self._page.wait_for_load_state("domcontentloaded", timeout=NAV_DOM_TIMEOUT)
+        except PlaywrightTimeoutError:
+            pass
+
+    def set_resource_blocking(self, enabled: bool, images: Optional[bool] = None):
+        """
+        Turns subresource blocking on/off (media + trackers, plus images and fonts if
+        images=True). Applies to the open browser immediately and to later launches.
+        """
+        self._block_resources = enabled
+        if images is not None:
+            self._block_images = images
+        if self._browser:
+            self._apply_resource_blocking()
+
+    def _remove_resource_blocking(self):
+        if self._block_pattern is not None:
+            try:
+                self._browser.unroute(self._block_pattern)
+            except Exception as e:
+                _logger.warning(f"Error removing resource block: {e}", agent="Browser")
+            self._block_pattern = None
+
+    def _apply_resource_blocking(self):
+        self._remove_resource_blocking()
+        if not self._block_resources:
+            return
+        pattern = _MEDIA_AND_TRACKERS + ("|" + _IMAGES_AND_FONTS if self._block_images else "")
+        self._block_pattern = re.compile(pattern, re.I)
+        self._browser.route(self._block_pattern, lambda route: route.abort())
+
+    @staticmethod
+    def _storage_state_path(site_name: str) -> str:
+        return os.path.abspath(f"./profiles/{site_name}.json")
+
+    def _switch_site_context(self, site_name: str) -> bool:
+        """
+        Moves to site_name without relaunching Chromium. The first site keeps its
+        persistent profile context open; every other site gets a fresh context on a
+        shared non-persistent browser, restored from and saved back to its own
+        ./profiles/<site>.json, so no site's cookies end up in another site's profile.
+        Returns False (caller relaunches) if anything goes wrong.
+        """
+        if not self._home_page or self._home_page.is_closed():
+            return False
+        try:
+            self._remove_resource_blocking()
+            self._close_guest_context()
+            if site_name == self._home_site:
+                self._browser, self._page = self._home_context, self._home_page
+                self._apply_resource_blocking()
+            else:
+                if self._guest_browser is None or not self._guest_browser.is_connected():
+                    self._guest_browser = self._playwright.chromium.launch(
+                        headless=self._headless_mode, args=_LAUNCH_ARGS
+                    )
+                target = self._storage_state_path(site_name)
+                context = self._guest_browser.new_context(
+                    storage_state=target if os.path.exists(target) else None,
+                    **_CONTEXT_OPTIONS,
+                )
+                self._browser, self._page = context, context.new_page()
+                self._prepare_context(self._browser, self._page)
+            self._current_site_name = site_name
+            self._content_cache = None
+            self.invalidate_som_locators()
+            _logger.info(f"Switched to '{site_name}' session without relaunch", agent="Browser")
+            return True
+        except Exception as e:
+            _logger.warning(f"Session switch failed ({e}), relaunching browser", agent="Browser")
+            return False
+
+    def _close_guest_context(self):
+        """Saves the open non-home site's storage_state to its own file and closes its context."""
+        if self._browser is None or self._browser is self._home_context:
+            return
+        try:
+            self._browser.storage_state(path=self._storage_state_path(self._current_site_name))
+        except Exception as e:
+            _logger.warning(f"Error saving session state: {e}", agent="Browser")
+        try:
+            self._browser.close()
+        except Exception as e:
+            _logger.warning(f"Error closing browser context: {e}", agent="Browser")
+        self._browser, self._page = self._home_context, self._home_page
+
     def close_browser(self) -> str:
-        """Safe cleanup."""
+        """Safe cleanup of the page and context. The Playwright driver is kept for the next launch."""
         _logger.info("Closing browser...", agent="Browser")
         try:
+            self._close_guest_context()
             if self._page:
                 try:
                     self._page.close()
@@ -116,24 +313,93 @@ class BrowserManager:
                     self._browser.close()
                 except Exception as e:
                     _logger.warning(f"Error closing browser context: {e}", agent="Browser")
-            if self._playwright:
+            if self._guest_browser:
                 try:
-                    self._playwright.stop()
+                    self._guest_browser.close()
                 except Exception as e:
-                    _logger.warning(f"Error stopping Playwright: {e}", agent="Browser")
+                    _logger.warning(f"Error closing session browser: {e}", agent="Browser")
 
             self._page = None
             self._browser = None
-            self._playwright = None
+            self._home_context = None
+            self._home_page = None
+            self._home_site = None
+            self._guest_browser = None
+            self._block_pattern = None
             self._current_site_name = None
+            self._content_cache = None
+            self._locator_cache = {}
             return "Browser closed"
         except Exception as e:
             return f"Error closing: {e}"
 
+    def shutdown(self):
+        """Closes the browser and stops the Playwright driver (end of a run / interpreter exit)."""
+        if self._browser or self._page or self._guest_browser:
+            self.close_browser()
+        if self._playwright:
+            try:
+                self._playwright.stop()
+            except Exception as e:
+                _logger.warning(f"Error stopping Playwright: {e}", agent="Browser")
+            self._playwright = None
+            self._playwright_thread = None
+
     def get_page(self) -> Optional[Page]:
         return self._page
 
+    def _on_frame_navigated(self, frame):
+        if frame.parent_frame is None:
+            self._nav_count += 1
+            self.invalidate_som_locators()
+
+    def get_som_locator(self, element_id: int) -> Optional[Locator]:
+        """
+        Returns the Locator for a Set-of-Marks ID, built once per overlay.
+        Cleared on main-frame navigation and whenever the overlay is rebuilt.
+        """
+        if not self._page:
+            return None
+        loc = self._locator_cache.get(element_id)
+        if loc is None:
+            loc = self._page.locator(_som_selector(element_id)).first
+            self._locator_cache[element_id] = loc
+        return loc
+
+    def invalidate_som_locators(self):
+        """Drops cached Set-of-Marks locators (IDs are reassigned by each overlay scan)."""
+        self._locator_cache = {}
+
+    def _on_page_load(self, _page):
+        self._nav_count += 1
+
+    @property
+    def navigation_count(self) -> int:
+        """Bumped on every main-frame navigation/load; lets callers detect stale page-derived state."""
+        return self._nav_count
+
+    def get_cached_content(self) -> Optional[str]:
+        """
+        Returns page.content() for the current page, reusing the last snapshot
+        until the page navigates or its DOM is mutated.
+        """
+        page = self._page
+        if not page:
+            return None
+        try:
+            version = (self._nav_count, page.url, page.evaluate(_DOM_VERSION_JS))
+        except Exception:
+            return page.content()
+
+        if self._content_cache and self._content_cache[0] == version:
+            return self._content_cache[1]
+
+        html = page.content()
+        self._content_cache = (version, html)
+        return html
+
     def is_browser_open(self) -> bool:
         return self._page is not None and not self._page.is_closed()
 
-browser_manager = BrowserManager()
\ No newline at end of file
+browser_manager = BrowserManager()
+atexit.register(browser_manager.shutdown)
\ No newline at end of file
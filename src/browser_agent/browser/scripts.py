@@ -0,0 +1,183 @@
+"""
+In-page JavaScript used by the browser tools.
+
+PAGE_INIT_SCRIPT is registered on the browser context at launch, so every document
+gets these functions compiled once as window.<name>. Tools call them through
+run_page_script(), which only ships the full source for pages that lack them
+(e.g. documents loaded before the init script was registered).
+"""
+
+# Tags interactive elements with data-ai-id, draws the numbered boxes, returns their details
+SOM_OVERLAY_JS = """
+() => {
+    document.querySelectorAll('.ai-som-overlay').forEach(el => el.remove());
+    
+    // Select inputs, buttons, links, etc.
+    const elements = document.querySelectorAll('a, button, input, textarea, select, [role="button"], [onclick], [tabindex]:not([tabindex="-1"])');
+    
+    // Pass 1 (read only): measure every candidate before touching the DOM,
+    // so layout is computed once instead of after every overlay insert
+    const items = [];
+    elements.forEach(el => {
+        const rect = el.getBoundingClientRect();
+        if (rect.width <= 5 || rect.height <= 5) return;
+        const style = window.getComputedStyle(el);
+        if (style.visibility === 'hidden' || style.display === 'none') return;
+        
+        // Extract Text for Search
+        let text = el.innerText || el.placeholder || el.value || el.getAttribute('aria-label') || "";
+        text = text.replace(/\\s+/g, ' ').trim();
+        
+        // Filter empty non-inputs
+        if (!text && el.tagName.toLowerCase() !== 'input' && !el.querySelector('img')) return;
+        
+        items.push({el, rect, text});
+    });
+    
+    // Pass 2 (write only): tag elements and build every box in a detached fragment
+    const scrollX = window.scrollX, scrollY = window.scrollY;
+    const frag = document.createDocumentFragment();
+    const data = items.map(({el, rect, text}, i) => {
+        const id = i + 1;
+        
+        // Assign ID
+        el.setAttribute('data-ai-id', id);
+        
+        // Draw Box
+        const overlay = document.createElement('div');
+        overlay.className = 'ai-som-overlay';
+        overlay.style.cssText =
+            `position:absolute;left:${rect.left + scrollX}px;top:${rect.top + scrollY}px;` +
+            `width:${rect.width}px;height:${rect.height}px;border:2px solid #FF0000;` +
+            `z-index:2147483647;pointer-events:none;`;
+        
+        const label = document.createElement('span');
+        label.className = 'ai-som-overlay';
+        label.textContent = id;
+        label.style.cssText =
+            'position:absolute;top:-20px;left:0;background-color:#FF0000;' +
+            'color:white;font-size:12px;z-index:2147483648;';
+        
+        overlay.appendChild(label);
+        frag.appendChild(overlay);
+        
+        return {
+            id: id,
+            tag: el.tagName.toLowerCase(),
+            type: el.getAttribute('type') || '',
+            text: text.substring(0, 100) // Limit text length
+        };
+    });
+    document.body.appendChild(frag);
+    
+    return data;
+}
+"""
+
+# Lists elements tagged by the overlay as "[id] <tag type>: text" lines
+INTERACTIVE_ELEMENTS_JS = """
+() => {
+    const els = document.querySelectorAll('[data-ai-id]');
+    return Array.from(els).map(el => {
+        const tag = el.tagName.toLowerCase();
+        const type = el.getAttribute('type') || '';
+        const id = el.getAttribute('data-ai-id');
+        
+        // Get useful text
+        let text = el.innerText || el.placeholder || el.getAttribute('aria-label') || el.value || '';
+        text = text.replace(/\\s+/g, ' ').trim().substring(0, 50); // Clean and truncate
+        
+        return `[${id}] <${tag} ${type}>: "${text}"`;
+    });
+}
+"""
+
+# Visible text/textarea/select fields as short-key records (see get_visible_input_fields)
+VISIBLE_INPUTS_JS = '''
+() => {
+    const fields = [];
+    const inputs = document.querySelectorAll('input[type="text"], input:not([type]), textarea, select');
+    
+    inputs.forEach((input, idx) => {
+        // offsetParent is null for display:none (self or ancestor), so layout
+        // metrics rule most inputs out before any style resolution is needed
+        if (input.offsetParent === null || input.offsetWidth === 0 || input.offsetHeight === 0) return;
+        if (window.getComputedStyle(input).visibility === 'hidden') return;
+        
+        fields.push({
+            x: idx,
+            g: input.tagName,
+            p: input.placeholder || '',
+            n: input.name || '',
+            i: input.id || '',
+            t: input.type,
+            v: input.value,
+            c: input.className
+        });
+    });
+    
+    return fields;
+}
+'''
+
+# Finds a visible dropdown option for the given text and marks it with
+# data-ai-dropdown-hit: exact text first, else the innermost element containing it.
+# Open listbox/menu containers (and whatever an expanded trigger's aria-controls
+# points at) are searched first, so the whole page is only scanned as a fallback.
+# Marks from earlier probes are cleared first. Returns whether an option was found.
+DROPDOWN_OPTION_PROBE_JS = """
+(text) => {
+    document.querySelectorAll('[data-ai-dropdown-hit]').forEach(n => n.removeAttribute('data-ai-dropdown-hit'));
+    const selector = '[role=option], [role=menuitem], li, option, a, span, div';
+    const visible = (n) => !!(n.offsetParent || n.getClientRects().length);
+    const norm = (n) => (n.textContent || '').replace(/\\s+/g, ' ').trim();
+    const wanted = text.trim();
+    const lower = wanted.toLowerCase();
+
+    const scan = (candidates) => {
+        const containing = [];
+        for (const n of candidates) {
+            const t = norm(n);
+            if (t === wanted && visible(n)) return n;
+            if (t.toLowerCase().includes(lower) && visible(n)) containing.push(n);
+        }
+        // Document order puts a match's matching descendants right after it, so the
+        // innermost one is the first whose successor is not inside it
+        return containing.find((n, i) => i + 1 === containing.length || !n.contains(containing[i + 1])) || null;
+    };
+
+    const roots = [];
+    document.querySelectorAll('[aria-expanded="true"][aria-controls]').forEach(t => {
+        const r = document.getElementById(t.getAttribute('aria-controls'));
+        if (r) roots.push(r);
+    });
+    document.querySelectorAll('[role=listbox], [role=menu]').forEach(r => roots.push(r));
+
+    let hit = null;
+    for (const root of roots) {
+        if (visible(root) && (hit = scan(root.querySelectorAll(selector)))) break;
+    }
+    if (!hit) hit = scan(document.querySelectorAll(selector));
+    if (!hit) return false;
+    hit.setAttribute('data-ai-dropdown-hit', '1');
+    return true;
+}
+"""
+
+PAGE_SCRIPTS = {
+    "__aiEnableOverlay": SOM_OVERLAY_JS,
+    "__aiGetInteractiveElements": INTERACTIVE_ELEMENTS_JS,
+    "__aiGetVisibleInputs": VISIBLE_INPUTS_JS,
+}
+
+PAGE_INIT_SCRIPT = "\n".join(f"window.{name} = {source.strip()};" for name, source in PAGE_SCRIPTS.items())
+
+_CALLS = {name: f"() => window.{name} ? window.{name}() : null" for name in PAGE_SCRIPTS}
+
+
+def run_page_script(page, name: str):
+    """Invokes the named page function, falling back to evaluating its source if the page lacks it."""
+    result = page.evaluate(_CALLS[name])
+    if result is None:
+        result = page.evaluate(PAGE_SCRIPTS[name])
+    return result
@@ -1,5 +1,5 @@
 
-from .base import SOM_STATE, get_som_state, set_som_state
+from .base import get_som_state, set_som_state
 from .vision import enable_vision_overlay, find_element_ids, get_interactive_elements, get_accessibility_tree
 from .extraction import get_page_text, extract_text_from_selector, extract_attribute_from_selector, get_visible_input_fields
 from .interaction import (
@@ -10,8 +10,8 @@ from .interaction import (
 from .navigation import scroll_one_screen, scroll_to_bottom
 from .smart_interact import smart_click, smart_type
 
-# All tools in one list - useful for passing to an agent
-ALL_TOOLS = [
+# All tools in one (immutable) sequence - useful for passing to an agent
+ALL_TOOLS = (
     enable_vision_overlay,
     find_element_ids,
     get_interactive_elements,
@@ -35,4 +35,7 @@ ALL_TOOLS = [
     # Smart interaction (vision-aware)
     smart_click,
     smart_type,
-]
\ No newline at end of file
+)
+
+# Name -> tool, for constant-time dispatch of model tool calls
+TOOLS_BY_NAME = {t.name: t for t in ALL_TOOLS}
@@ -3,15 +3,59 @@ from playwright.sync_api import Page, Locator
 from langchain_core.tools import tool
 from ..manager import browser_manager
 import json
+import re
 import time
 import random
+from collections import defaultdict
 
 SOM_STATE = []
 
+# Derived from SOM_STATE once per overlay scan so element searches don't re-scan it
+_som_lowered = []
+_som_token_index = {}
+# browser_manager.navigation_count when SOM_STATE was captured
+_som_nav_count = None
+
+_TOKEN_RE = re.compile(r"\w+")
+
+
+def _som_tokens(text: str) -> list:
+    """Lowercase word tokens, split on whitespace and punctuation."""
+    return _TOKEN_RE.findall(text.lower())
+
+
 def get_som_state():
     global SOM_STATE
     return SOM_STATE
 
 def set_som_state(state):
-    global SOM_STATE
-    SOM_STATE = state
\ No newline at end of file
+    global SOM_STATE, _som_lowered, _som_token_index, _som_nav_count
+    SOM_STATE = state
+    _som_nav_count = browser_manager.navigation_count
+    _som_lowered = [f"{el['tag']} {el['type']} {el['text']}".lower() for el in state]
+    index = defaultdict(set)
+    for pos, content in enumerate(_som_lowered):
+        for token in _TOKEN_RE.findall(content):
+            index[token].add(pos)
+    _som_token_index = dict(index)
+
+def is_som_state_current() -> bool:
+    """True if SOM_STATE was captured on the page that is currently loaded."""
+    return bool(SOM_STATE) and _som_nav_count == browser_manager.navigation_count
+
+def search_som_state(query: str) -> list:
+    """
+    Positions in SOM_STATE matching query, in page order.
+    Elements containing every query word (in any order) are looked up in the
+    token index. Only when that finds nothing, or a query word is not a whole
+    token anywhere (e.g. "log" for "login"), are elements scanned for the query
+    as a substring.
+    """
+    query = query.lower().strip()
+    tokens = _som_tokens(query)
+    postings = [_som_token_index.get(t) for t in tokens]
+    if postings and all(postings):
+        hits = set.intersection(*postings)
+        if hits:
+            return sorted(hits)
+    return [pos for pos, content in enumerate(_som_lowered) if query in content]
@@ -1,5 +1,19 @@
 from langchain_core.tools import tool
+from playwright.sync_api import TimeoutError as PlaywrightTimeoutError
 from browser_agent.browser.manager import browser_manager
+from browser_agent.browser.scripts import run_page_script
+
+
+def _ensure_selector_ready(page, selector: str, timeout: int = 5000):
+    """
+    Waits until selector is attached to the DOM (returns immediately if it already is).
+    Used instead of a full-page "load" wait, which also blocks on images, fonts and ads.
+    """
+    try:
+        page.locator(selector).first.wait_for(state="attached", timeout=timeout)
+    except PlaywrightTimeoutError:
+        pass
+
 
 @tool
 def get_page_text() -> str:
@@ -11,7 +25,8 @@ def get_page_text() -> str:
     page = browser_manager.get_page()
     if not page: return "Error: No page open"
     try:
-        return page.evaluate("document.body.innerText")[:10000] # Limit to 10k chars
+        # Truncate in the page so only the first 10k chars cross CDP
+        return page.evaluate("() => document.body.innerText.substring(0, 10000)")
     except Exception as e:
         return f"Error reading text: {e}"
 
@@ -25,10 +40,10 @@ def extract_text_from_selector(selector: str) -> str:
         selector: CSS selector for the element
     """
     page = browser_manager.get_page()
-    page.wait_for_load_state("load")
     if not page:
         return "Error: No browser page is open"
     try:
+        _ensure_selector_ready(page, selector)
         if page.locator(selector).count() > 0:
             return page.locator(selector).first.inner_text().strip()
         return "Not Found"
@@ -46,10 +61,10 @@ def extract_attribute_from_selector(selector: str, attribute: str = "href") -> s
         attribute: Attribute name to extract (default: href)
     """
     page = browser_manager.get_page()
-    page.wait_for_load_state("load",timeout=60000)
     if not page:
         return "Error: No browser page is open"
     try:
+        _ensure_selector_ready(page, selector)
         element = page.locator(selector).first
         return element.get_attribute(attribute) or ""
     except Exception as e:
@@ -70,46 +85,28 @@ def get_visible_input_fields() -> dict:
         return {"error": "no browser page is open"}
     
     try:
-        visible_fields = page.evaluate('''
-            () => {
-                const fields = {};
-                const inputs = document.querySelectorAll('input[type="text"], input:not([type]), textarea, select');
-                
-                inputs.forEach((input, idx) => {
-                    const style = window.getComputedStyle(input);
-                    const isVisible = style.display !== 'none' && 
-                                    style.visibility !== 'hidden' && 
-                                    input.offsetParent !== null &&
-                                    input.offsetWidth > 0 &&
-                                    input.offsetHeight > 0;
-                    
-                    if (isVisible) {
-                        const placeholder = input.placeholder || input.name || input.id || `field_${idx}`;
-                        const tagName = input.tagName;
-                        const value = input.value;
-                        const classes = input.className;
-                        
-                        fields[placeholder] = {
-                            tag: tagName,
-                            placeholder: input.placeholder,
-                            name: input.name,
-                            id: input.id,
-                            type: input.type,
-                            value: value,
-                            class: classes,
-                            selector_options: [
-                                input.id ? `#${input.id}` : null,
-                                input.placeholder ? `input[placeholder="${input.placeholder}"]` : null,
-                                input.placeholder ? `input[placeholder*="${input.placeholder.split(' ')[0]}"]` : null,
-                                input.name ? `input[name="${input.name}"]` : null,
-                            ].filter(Boolean)
-                        };
-                    }
-                });
-                
-                return fields;
+        # Short keys keep the CDP payload small; selector candidates are rebuilt below
+        raw_fields = run_page_script(page, "__aiGetVisibleInputs")
+        
+        visible_fields = {}
+        for f in raw_fields:
+            placeholder, name, el_id = f["p"], f["n"], f["i"]
+            key = placeholder or name or el_id or f"field_{f['x']}"
+            visible_fields[key] = {
+                "tag": f["g"],
+                "placeholder": placeholder,
+                "name": name,
+                "id": el_id,
+                "type": f["t"],
+                "value": f["v"],
+                "class": f["c"],
+                "selector_options": [opt for opt in (
+                    f"#{el_id}" if el_id else None,
+                    f'input[placeholder="{placeholder}"]' if placeholder else None,
+                    f'input[placeholder*="{placeholder.split(" ")[0]}"]' if placeholder else None,
+                    f'input[name="{name}"]' if name else None,
+                ) if opt]
             }
-        ''')
         return visible_fields if visible_fields else {"note":"No visible input fields found"}
     except Exception as e:
         return {"error" : f"Could not get visible input fields: {str(e)}"}
\ No newline at end of file
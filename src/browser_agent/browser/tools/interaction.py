@@ -1,5 +1,68 @@
 from langchain_core.tools import tool
+from playwright.sync_api import TimeoutError as PlaywrightTimeoutError
 from browser_agent.browser.manager import browser_manager
+from browser_agent.browser.scripts import DROPDOWN_OPTION_PROBE_JS
+
+# How long a Set-of-Marks action waits for its element before reporting it missing (ms)
+SOM_ACTION_TIMEOUT = 5000
+
+# JS-injection fill fallback. Selector and text are passed as arguments, so quotes in
+# either are safe and the same function source is reused on every call.
+_FILL_JS = """
+([sel, val]) => {
+    const el = document.querySelector(sel);
+    if (!el) return false;
+    el.value = val;
+    el.dispatchEvent(new Event('input', { bubbles: true }));
+    el.dispatchEvent(new Event('change', { bubbles: true }));
+    el.dispatchEvent(new Event('blur', { bubbles: true }));
+    return true;
+}
+"""
+
+# Common tooltip containers, for hover_element to return as soon as one shows up
+_TOOLTIP_SELECTOR = '[role="tooltip"], .tooltip >> visible=true'
+# Signals that a custom dropdown has finished opening
+_DROPDOWN_OPEN_SELECTOR = '[aria-expanded="true"], [role="listbox"], [role="menu"], [role="option"] >> visible=true'
+
+
+# Elements that render dropdown / menu options. Plain CSS with Playwright's text
+# pseudo-classes is matched by direct traversal, unlike get_by_text's accessible-name walk.
+_OPTION_TAGS = ("[role=option]", "[role=menuitem]", "li", "option")
+_OPTION_EXACT_TAGS = _OPTION_TAGS + ("a", "span", "div")
+
+
+def _quote_text(text: str) -> str:
+    """Quotes text for :text-is()/:has-text() so quotes and backslashes in it are safe."""
+    return '"' + text.replace("\\", "\\\\").replace('"', '\\"') + '"'
+
+
+def _option_locator(page, option_text: str, exact: bool):
+    """First dropdown option whose text equals (exact) or contains option_text."""
+    quoted = _quote_text(option_text)
+    if exact:
+        selector = ", ".join(f"{tag}:text-is({quoted})" for tag in _OPTION_EXACT_TAGS)
+    else:
+        selector = ", ".join(f"{tag}:has-text({quoted})" for tag in _OPTION_TAGS)
+    return page.locator(selector).first
+
+
+def _wait_visible(locator, timeout: int) -> bool:
+    """Waits up to timeout ms for locator to become visible; returns False instead of raising."""
+    try:
+        locator.wait_for(state="visible", timeout=timeout)
+        return True
+    except PlaywrightTimeoutError:
+        return False
+
+
+def _wait_hidden(locator, timeout: int) -> bool:
+    """Waits up to timeout ms for locator to disappear (e.g. a dropdown closing after a pick)."""
+    try:
+        locator.wait_for(state="hidden", timeout=timeout)
+        return True
+    except PlaywrightTimeoutError:
+        return False
 
 
 @tool
@@ -9,17 +72,15 @@ def click_id(element_id: int):
     Example: click_id(12)
     """
     #time.sleep(15)
-    page = browser_manager.get_page()
-    if not page: return "Error: No page open"
+    loc = browser_manager.get_som_locator(element_id)
+    if not loc: return "Error: No page open"
     
     try:
-        loc = page.locator(f'[data-ai-id="{element_id}"]').first
-        if loc.count() == 0:
-            return f"Error: Element ID {element_id} not found. Did you run enable_vision_overlay()?"
-        
-        loc.scroll_into_view_if_needed()
-        loc.click(force=True) 
+        # click() scrolls the element into view itself; a missing ID surfaces as a timeout
+        loc.click(force=True, timeout=SOM_ACTION_TIMEOUT)
         return f"Clicked Element #{element_id}"
+    except PlaywrightTimeoutError:
+        return f"Error: Element ID {element_id} not found. Did you run enable_vision_overlay()?"
     except Exception as e:
         return f"Error clicking #{element_id}: {e}"
 
@@ -30,17 +91,14 @@ def fill_id(element_id: int, text: str):
     Example: fill_id(45, "Python Developer")
     """
     #time.sleep(15)
-    page = browser_manager.get_page()
-    if not page: return "Error: No page open"
+    loc = browser_manager.get_som_locator(element_id)
+    if not loc: return "Error: No page open"
     
     try:
-        loc = page.locator(f'[data-ai-id="{element_id}"]').first
-        if loc.count() == 0:
-            return f"Error: Element ID {element_id} not found."
-            
-        loc.scroll_into_view_if_needed()
-        loc.fill(text)
+        loc.fill(text, timeout=SOM_ACTION_TIMEOUT)
         return f"Filled Element #{element_id} with '{text}'"
+    except PlaywrightTimeoutError:
+        return f"Error: Element ID {element_id} not found."
     except Exception as e:
         return f"Error filling #{element_id}: {e}"
 
@@ -58,11 +116,10 @@ def press_key(key: str):
 @tool
 def upload_file_by_id(element_id: int, file_path: str):
     """Uploads file."""
-    page = browser_manager.get_page()
-    if not page: return "No browser open."
+    loc = browser_manager.get_som_locator(element_id)
+    if not loc: return "No browser open."
     try:
-        loc = page.locator(f'[data-ai-id="{element_id}"]').first
-        loc.set_input_files(file_path)
+        loc.set_input_files(file_path, timeout=SOM_ACTION_TIMEOUT)
         return f"Uploaded to #{element_id}"
     except Exception as e:
         return f"Upload error: {e}"
@@ -75,26 +132,15 @@ def click_element(selector: str):
     if not page: return "Error: No browser page is open"
     
     try:
-        
-        count = page.locator(selector).count()
-        if count > 1:
-            print(f"Warning: {count} elements found for '{selector}'. Clicking the first visible one.")
-            locator = page.locator(selector).filter(has=page.locator("visible=true")).first
-            if not locator.is_visible():
-                locator = page.locator(selector).first
-        else:
-            locator = page.locator(selector).first
+        # First visible match, resolved browser-side; click() itself scrolls and waits
+        # for the element to be visible, stable and enabled
+        locator = page.locator(selector).locator("visible=true").first
 
-        
-        locator.scroll_into_view_if_needed()
-        page.wait_for_timeout(500)
-
-        
         try:
             locator.click(timeout=2000)
         except Exception as e:
             print(f"Standard click failed ({e}). forcing click...")
-            locator.click(force=True)
+            page.locator(selector).first.click(force=True)
             
         page.wait_for_load_state("domcontentloaded")
         return f"Clicked: {selector}"
@@ -108,12 +154,7 @@ def fill_element(selector: str, text: str):
     if not page: return "Error: No browser page is open"
     
     try:
-        locator = page.locator(selector).first
-        
-        
-        if not locator.is_visible():
-            locator.scroll_into_view_if_needed()
-            page.wait_for_timeout(500)
+        locator = page.locator(selector).locator("visible=true").first
 
         
         try:
@@ -125,15 +166,7 @@ def fill_element(selector: str, text: str):
             print(f"Standard fill failed. Using JS Injection for {selector}...")
 
         
-        page.evaluate(f"""
-            const el = document.querySelector('{selector}');
-            if (el) {{
-                el.value = '{text}';
-                el.dispatchEvent(new Event('input', {{ bubbles: true }}));
-                el.dispatchEvent(new Event('change', {{ bubbles: true }}));
-                el.dispatchEvent(new Event('blur', {{ bubbles: true }}));
-            }}
-        """)
+        page.evaluate(_FILL_JS, [selector, text])
         
         page.keyboard.press("Enter")
         
@@ -157,14 +190,14 @@ def select_dropdown_option(option_text: str, dropdown_selector: str = None, opti
     
     try:
         
-        page.wait_for_timeout(500)
-        
         target_option = None
 
         
         if dropdown_selector and option_selector:
             
             target_option = page.locator(f"{dropdown_selector} {option_selector}").filter(has_text=option_text).first
+            # Give a just-opened dropdown time to render, but only as long as it needs
+            _wait_visible(target_option, 500)
             if target_option.count() == 0:
                 
                 target_option = page.locator(f"{dropdown_selector} span, {dropdown_selector} div").filter(has_text=option_text).first
@@ -172,16 +205,15 @@ def select_dropdown_option(option_text: str, dropdown_selector: str = None, opti
         
         elif option_text:
             
-            target_option = page.get_by_text(option_text, exact=True).first
-            if not target_option.is_visible():
-                 target_option = page.get_by_text(option_text, exact=False).first
+            target_option = _option_locator(page, option_text, exact=True)
+            if not _wait_visible(target_option, 500):
+                 target_option = _option_locator(page, option_text, exact=False)
 
         
-        if target_option and target_option.count() > 0 and target_option.is_visible():
-            target_option.scroll_into_view_if_needed()
-            page.wait_for_timeout(200)
+        if target_option and target_option.is_visible():
             target_option.click(force=True) 
-            page.wait_for_timeout(800)
+            # Done once the dropdown closes (bounded for menus that stay open)
+            _wait_hidden(target_option, 800)
             return f"Selected option: '{option_text}'"
         else:
             return f"Error: Option '{option_text}' not visible. Ensure the dropdown is open first."
@@ -209,36 +241,20 @@ def open_dropdown_and_select(dropdown_selector: str, option_text: str, click_to_
     
     try:
         
-        dropdown_trigger = page.locator(dropdown_selector).first
-        
-        if not dropdown_trigger.is_visible():
-            dropdown_trigger.scroll_into_view_if_needed()
-            page.wait_for_timeout(300)
+        dropdown_trigger = page.locator(dropdown_selector).locator("visible=true").first
         
         if click_to_open:
             dropdown_trigger.click(force=True)
-            page.wait_for_timeout(1000)  # Wait for dropdown animation
-        
-        
-        option_element = None
-        
-        
-        option_element = page.get_by_text(option_text, exact=True).first
+            # Wait for dropdown animation: until the menu reports itself open (bounded as before)
+            _wait_visible(page.locator(_DROPDOWN_OPEN_SELECTOR).first, 1000)
         
         
-        if option_element.count() == 0:
-            option_element = page.get_by_text(option_text, exact=False).first
-        
-        
-        if option_element.count() == 0:
-            option_element = page.locator(f"span:has-text('{option_text}'), div:has-text('{option_text}'), option:has-text('{option_text}')").first
-        
-        
-        if option_element.count() > 0 and option_element.is_visible():
-            option_element.scroll_into_view_if_needed()
-            page.wait_for_timeout(200)
+        # One in-page probe (exact text, then innermost containing element) instead of
+        # a round-trip per fallback selector
+        if page.evaluate(DROPDOWN_OPTION_PROBE_JS, option_text):
+            option_element = page.locator('[data-ai-dropdown-hit="1"]').first
             option_element.click(force=True)
-            page.wait_for_timeout(800)
+            _wait_hidden(option_element, 800)
             return f"Successfully opened dropdown and selected: '{option_text}'"
         else:
             return f"Error: Could not find option '{option_text}' in dropdown menu. Dropdown may not have opened correctly."
@@ -264,15 +280,14 @@ def select_native_select_option(select_selector: str, option_value: str):
         return "Error: No browser page is open"
     
     try:
-        select_element = page.locator(select_selector).first
-        
-        if not select_element.is_visible():
-            select_element.scroll_into_view_if_needed()
-            page.wait_for_timeout(300)
-        
-     
+        # select_option() waits for a visible, enabled match and scrolls to it itself
+        select_element = page.locator(select_selector).locator("visible=true").first
         select_element.select_option(option_value)
-        page.wait_for_timeout(800)
+        # Returns at once unless the change kicked off requests (e.g. a dependent field reloading)
+        try:
+            page.wait_for_load_state("networkidle", timeout=1000)
+        except PlaywrightTimeoutError:
+            pass
         
         return f"Selected '{option_value}' from select element"
     except Exception as e:
@@ -296,26 +311,23 @@ def hover_element(selector: str, wait_time: int = 1500):
         return "Error: No browser page is open"
     
     try:
-        element = page.locator(selector).first
+        matches = page.locator(selector)
         
         
-        if element.count() == 0:
+        if matches.count() == 0:
             return f"Error: Element not found with selector: {selector}"
         
     
-        if not element.is_visible():
-            element.scroll_into_view_if_needed()
-            page.wait_for_timeout(300)
-        
-        
-        if not element.is_visible():
+        element = matches.locator("visible=true").first
+        if element.count() == 0:
             return f"Error: Element with selector '{selector}' exists but is not visible"
         
         
         element.hover(force=True)
         
         
-        page.wait_for_timeout(wait_time)
+        # Up to wait_time for help text, returning early once a tooltip is shown
+        _wait_visible(page.locator(_TOOLTIP_SELECTOR).first, wait_time)
         
         return f"Successfully hovered over element: {selector}. Tooltip/help text should now be visible."
     
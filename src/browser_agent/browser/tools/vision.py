@@ -1,6 +1,14 @@
 from langchain_core.tools import tool
 from browser_agent.browser.manager import browser_manager
-from .base import get_som_state, set_som_state
+from ..scripts import run_page_script
+from .base import get_som_state, set_som_state, search_som_state, is_som_state_current
+
+_A11Y_INTERESTING_ROLES = frozenset(["button", "link", "textbox", "combobox", "checkbox"])
+_INDENTS = tuple("  " * depth for depth in range(32))
+
+
+def _indent(depth: int) -> str:
+    return _INDENTS[depth] if depth < len(_INDENTS) else "  " * depth
 
 
 @tool
@@ -16,74 +24,11 @@ def enable_vision_overlay():
     if not page: return "Error: No page open"
 
     try:
-        elements_data = page.evaluate("""
-            () => {
-                document.querySelectorAll('.ai-som-overlay').forEach(el => el.remove());
-                let idCounter = 1;
-                let data = [];
-                
-                // Select inputs, buttons, links, etc.
-                const elements = document.querySelectorAll('a, button, input, textarea, select, [role="button"], [onclick], [tabindex]:not([tabindex="-1"])');
-                
-                elements.forEach(el => {
-                    const rect = el.getBoundingClientRect();
-                    const style = window.getComputedStyle(el);
-                    
-                    if (rect.width > 5 && rect.height > 5 && style.visibility !== 'hidden' && style.display !== 'none') {
-                        
-                        // Extract Text for Search
-                        let text = el.innerText || el.placeholder || el.value || el.getAttribute('aria-label') || "";
-                        text = text.replace(/\\s+/g, ' ').trim();
-                        
-                        // Filter empty non-inputs
-                        if (!text && el.tagName.toLowerCase() !== 'input' && !el.querySelector('img')) return;
-
-                        // Assign ID
-                        el.setAttribute('data-ai-id', idCounter);
-                        
-                        // Draw Box
-                        let overlay = document.createElement('div');
-                        overlay.className = 'ai-som-overlay';
-                        overlay.style.position = 'absolute';
-                        overlay.style.left = (rect.left + window.scrollX) + 'px';
-                        overlay.style.top = (rect.top + window.scrollY) + 'px';
-                        overlay.style.width = rect.width + 'px';
-                        overlay.style.height = rect.height + 'px';
-                        overlay.style.border = '2px solid #FF0000';
-                        overlay.style.zIndex = '2147483647';
-                        overlay.style.pointerEvents = 'none';
-                        
-                        let label = document.createElement('span');
-                        label.className = 'ai-som-overlay';
-                        label.innerText = idCounter;
-                        label.style.position = 'absolute';
-                        label.style.top = '-20px';
-                        label.style.left = '0';
-                        label.style.backgroundColor = '#FF0000';
-                        label.style.color = 'white';
-                        label.style.fontSize = '12px';
-                        label.style.zIndex = '2147483648';
-                        
-                        overlay.appendChild(label);
-                        document.body.appendChild(overlay);
-                        
-                        // Add to Data List
-                        data.push({
-                            id: idCounter,
-                            tag: el.tagName.toLowerCase(),
-                            type: el.getAttribute('type') || '',
-                            text: text.substring(0, 100) // Limit text length
-                        });
-
-                        idCounter++;
-                    }
-                });
-                return data;
-            }
-        """)
+        elements_data = run_page_script(page, "__aiEnableOverlay")
         
         
         set_som_state(elements_data)
+        browser_manager.invalidate_som_locators()
         
         return f"Success: Overlay enabled. {len(elements_data)} elements indexed in memory. Use 'find_element_ids' to find specific items."
 
@@ -105,16 +50,10 @@ def find_element_ids(query: str) -> str:
     if not som_data:
         return "Error: No elements indexed. Run 'enable_vision_overlay' first."
     
-    query = query.lower().strip()
-    matches = []
-    
-   
-    for el in som_data:
-       
-        content = f"{el['tag']} {el['type']} {el['text']}".lower()
-        
-        if query in content:
-            matches.append(f"[ID: {el['id']}] <{el['tag']}> {el['text']}")
+    matches = [
+        f"[ID: {el['id']}] <{el['tag']}> {el['text']}"
+        for el in (som_data[pos] for pos in search_som_state(query))
+    ]
     
     if not matches:
         return f"No elements found matching '{query}'. Try a broader term."
@@ -133,23 +72,16 @@ def get_interactive_elements() -> str:
     page = browser_manager.get_page()
     if not page: return "Error: No page open"
 
+    # Serve from the overlay scan when it was taken on this page (no CDP round-trip, no layout)
+    if is_som_state_current():
+        elements_info = [
+            f'[{el["id"]}] <{el["tag"]} {el["type"]}>: "{el["text"][:50]}"'
+            for el in get_som_state()
+        ]
+        return "Interactive Elements:\n" + "\n".join(elements_info)
+
     try:
-        elements_info = page.evaluate("""
-            () => {
-                const els = document.querySelectorAll('[data-ai-id]');
-                return Array.from(els).map(el => {
-                    const tag = el.tagName.toLowerCase();
-                    const type = el.getAttribute('type') || '';
-                    const id = el.getAttribute('data-ai-id');
-                    
-                    // Get useful text
-                    let text = el.innerText || el.placeholder || el.getAttribute('aria-label') || el.value || '';
-                    text = text.replace(/\\s+/g, ' ').trim().substring(0, 50); // Clean and truncate
-                    
-                    return `[${id}] <${tag} ${type}>: "${text}"`;
-                });
-            }
-        """)
+        elements_info = run_page_script(page, "__aiGetInteractiveElements")
         #print("Interactive Elements:\n" + "\n".join(elements_info))
         
         return "Interactive Elements:\n" + "\n".join(elements_info)
@@ -169,31 +101,29 @@ def get_accessibility_tree() -> str:
     try:
         snapshot = page.accessibility.snapshot()
         
-        def parse_node(node, depth=0):
-            text = ""
-            indent = "  " * depth
-            
+        # Iterative DFS into a list sink: no quadratic string building, no recursion limit
+        parts = []
+        stack = [(snapshot, 0)] if snapshot else []
+        while stack:
+            node, depth = stack.pop()
             
             role = node.get("role", "generic")
             name = node.get("name", "").strip()
             value = node.get("value", "")
             description = node.get("description", "")
             
+            if name or value or role in _A11Y_INTERESTING_ROLES:
+                parts.append(f"{_indent(depth)}- {role}")
+                if name: parts.append(f": '{name}'")
+                if value: parts.append(f" [Value: {value}]")
+                if description: parts.append(f" ({description})")
+                parts.append("\n")
             
-            if name or value or role in ["button", "link", "textbox", "combobox", "checkbox"]:
-                info = f"{role}"
-                if name: info += f": '{name}'"
-                if value: info += f" [Value: {value}]"
-                if description: info += f" ({description})"
-                
-                text += f"{indent}- {info}\n"
-            
-            for child in node.get("children", []):
-                text += parse_node(child, depth + 1)
-            
-            return text
+            children = node.get("children")
+            if children:
+                stack.extend((child, depth + 1) for child in reversed(children))
 
-        tree_text = parse_node(snapshot)
+        tree_text = "".join(parts)
         return f"Current Page Interactive Elements:\n{tree_text}"
     except Exception as e:
         return f"Error getting accessibility tree: {e}"
@@ -13,7 +13,9 @@ from .schemas import (
     Attribute_Properties,
     build_attributes_model,
     Step,
-    SupervisorOutput
+    SupervisorOutput,
+    parse_plan,
+    parse_supervisor_output
 )
 
 from .state import (
@@ -33,6 +35,8 @@ __all__ = [
     "build_attributes_model",
     "Step",
     "SupervisorOutput",
+    "parse_plan",
+    "parse_supervisor_output",
     
     # State
     "AgentState",
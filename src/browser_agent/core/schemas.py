@@ -2,25 +2,29 @@
 Pydantic schemas for browser agent state and outputs.
 """
 
-from typing import Dict, Iterable, List, Tuple, Any, Optional, Literal
-from pydantic import BaseModel, Field, create_model
+from functools import lru_cache
+from typing import Annotated, Dict, Iterable, List, Tuple, Any, Optional, Literal, Union
+from pydantic import BaseModel, Field, TypeAdapter, create_model
+from typing_extensions import TypedDict
 
+from .utils import extract_json_from_markdown
 
-class Attribute_Properties(BaseModel):
+
+# TypedDict rather than a nested BaseModel: pydantic validates it as a flat dict,
+# with no child model instance per element. (typing_extensions' version is the one
+# pydantic accepts on Python < 3.12.)
+class Attribute_Properties(TypedDict):
     """Properties of a UI element for selector extraction."""
     
-    element_name: str = Field(
-        ..., 
+    element_name: Annotated[str, Field(
         description="The name of the requirement (e.g., 'Login Button')."
-    )
-    playwright_selector: str = Field(
-        ..., 
+    )]
+    playwright_selector: Annotated[str, Field(
         description="The CSS selector or Playwright locator (e.g., 'button[type=\"submit\"]')."
-    )
-    strategy_used: str = Field(
-        ..., 
+    )]
+    strategy_used: Annotated[str, Field(
         description="Brief explanation (e.g., 'Used type attribute selector')."
-    )
+    )]
 
 
 def build_attributes_model(
@@ -48,6 +52,19 @@ def build_attributes_model(
         >>> model = build_attributes_model("LoginElements", ["login_button", "password_field"])
         >>> # LLM will return: {"login_button": {...}, "password_field": {...}}
     """
+    # Same field set -> same class, so repeat calls skip pydantic's schema build
+    names = tuple(dict.fromkeys(field_names))
+    return _build_attributes_model_cached(model_name, names, required, default_for_optional)
+
+
+@lru_cache(maxsize=256)
+def _build_attributes_model_cached(
+    model_name: str,
+    field_names: Tuple[str, ...],
+    required: bool,
+    default_for_optional: Any
+) -> type[BaseModel]:
+    """Memoized create_model() behind build_attributes_model."""
     fields: Dict[str, Tuple[type, Any]] = {}
     default_value = ... if required else default_for_optional
 
@@ -111,3 +128,42 @@ class SupervisorOutput(BaseModel):
     steps: List[Step] = Field(
         description="Ordered list of steps to execute, each with an agent and instruction"
     )
+
+
+# Validator built once at import rather than per parse
+_SUPERVISOR_OUTPUT_ADAPTER = TypeAdapter(SupervisorOutput)
+
+
+def parse_plan(text: Union[str, bytes]) -> SupervisorOutput:
+    """
+    Parse and validate a supervisor plan JSON document in one pass.
+    
+    validate_json runs JSON decoding and validation together in pydantic-core,
+    without building an intermediate dict.
+    
+    Args:
+        text: JSON document (str or bytes) matching SupervisorOutput
+        
+    Returns:
+        Validated SupervisorOutput
+        
+    Raises:
+        pydantic.ValidationError: If the JSON is malformed or doesn't match the schema
+    """
+    return _SUPERVISOR_OUTPUT_ADAPTER.validate_json(text)
+
+
+def parse_supervisor_output(text: str) -> SupervisorOutput:
+    """
+    Validate raw supervisor LLM output (optionally wrapped in a ```json fence).
+    
+    Args:
+        text: LLM response text
+        
+    Returns:
+        Validated SupervisorOutput
+        
+    Raises:
+        pydantic.ValidationError: If the extracted JSON doesn't match the schema
+    """
+    return parse_plan(extract_json_from_markdown(text))
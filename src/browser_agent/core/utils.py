@@ -2,10 +2,34 @@
 Core utility functions for the browser agent.
 """
 
-import re
 import json
 from typing import List, Dict, Any
-from langchain_core.tools import tool
+
+# orjson parses large LLM payloads several times faster than the stdlib;
+# its JSONDecodeError subclasses json.JSONDecodeError, so callers are unchanged.
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:
+    orjson = None
+    _json_loads = json.loads
+
+
+def _fenced_block(text: str) -> str | None:
+    """
+    Body of the first ```json ... ``` (or bare ```) fence in text, stripped; None if unfenced.
+    Plain str.find scanning, same result as matching ```(?:json)?\\s*(.*?)```.
+    """
+    open_at = text.find('```')
+    if open_at < 0:
+        return None
+    start = open_at + 3
+    if text.startswith('json', start):
+        start += 4
+    close_at = text.find('```', start)
+    if close_at < 0:
+        return None
+    return text[start:close_at].strip()
 
 
 def extract_json_from_markdown(text) -> str:
@@ -23,18 +47,17 @@ def extract_json_from_markdown(text) -> str:
     text = str(text).strip()
 
     # 1. Try markdown code block: ```json ... ```
-    md_match = re.search(r'```(?:json)?\s*\n?(.*?)\n?```', text, re.DOTALL)
-    if md_match:
-        candidate = md_match.group(1).strip()
+    candidate = _fenced_block(text)
+    if candidate is not None:
         try:
-            json.loads(candidate)
+            _json_loads(candidate)
             return candidate
         except (json.JSONDecodeError, ValueError):
             pass
 
     # 2. Try parsing the full text as-is
     try:
-        json.loads(text)
+        _json_loads(text)
         return text
     except (json.JSONDecodeError, ValueError):
         pass
@@ -65,7 +88,7 @@ def extract_json_from_markdown(text) -> str:
                 if depth == 0:
                     candidate = text[start:i + 1]
                     try:
-                        json.loads(candidate)
+                        _json_loads(candidate)
                         return candidate
                     except (json.JSONDecodeError, ValueError):
                         break
@@ -74,7 +97,6 @@ def extract_json_from_markdown(text) -> str:
     return text
 
 
-@tool
 def save_json_to_file(data: List[Dict[str, Any]], filename: str) -> None:
     """
     Save a list of dictionaries to a JSON file.
@@ -83,6 +105,11 @@ def save_json_to_file(data: List[Dict[str, Any]], filename: str) -> None:
         data: List of dictionaries to save
         filename: Name of the file to save to
     """
+    if orjson is not None:
+        # Encoded in one C call and written once; orjson only offers 2-space indents
+        with open(filename, 'wb') as f:
+            f.write(orjson.dumps(data, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS))
+        return
     with open(filename, 'w', encoding='utf-8') as f:
         json.dump(data, f, indent=4, ensure_ascii=False)
 
@@ -97,6 +124,10 @@ def load_json_from_file(filename: str) -> List[Dict[str, Any]]:
     Returns:
         List of dictionaries loaded from the file
     """
+    if orjson is not None:
+        # One read and one C-level parse instead of json.load's text decoding pass
+        with open(filename, 'rb') as f:
+            return orjson.loads(f.read())
     with open(filename, 'r', encoding='utf-8') as f:
         return json.load(f)
 
@@ -112,6 +143,6 @@ def parse_json_safe(text: str) -> Dict[str, Any] | None:
         Parsed dictionary or None if parsing fails
     """
     try:
-        return json.loads(text)
-    except json.JSONDecodeError:
+        return _json_loads(text)
+    except (json.JSONDecodeError, TypeError):
         return None
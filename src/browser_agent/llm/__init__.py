@@ -3,8 +3,8 @@ LLM system with multi-provider support and intelligent routing.
 """
 
 from .router import LLMRouter, LLMConfig, validate_config
-from .rate_limiter import APIKeyRotator, api_key_rotator
-from .providers import GeminiProvider, GroqProvider, SambanovaProvider, OllamaProvider
+from .rate_limiter import APIKeyRotator, get_api_key_rotator
+from . import providers
 
 __all__ = [
     "LLMRouter",
@@ -12,8 +12,19 @@ __all__ = [
     "validate_config",
     "APIKeyRotator",
     "api_key_rotator",
+    "get_api_key_rotator",
     "GeminiProvider",
     "GroqProvider",
     "SambanovaProvider",
     "OllamaProvider"
 ]
+
+
+def __getattr__(name: str):
+    # The key rotator and provider classes are resolved lazily so importing the
+    # package neither reads .env nor loads every SDK
+    if name == "api_key_rotator":
+        return get_api_key_rotator()
+    if name in providers.__all__:
+        return getattr(providers, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
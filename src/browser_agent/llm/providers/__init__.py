@@ -1,11 +1,27 @@
 """
 LLM provider implementations.
+
+Each provider pulls in its own LangChain SDK, so provider classes are imported on
+first attribute access (PEP 562) rather than with the package; a run configured
+for Gemini only never loads the Groq, SambaNova or Ollama clients.
 """
 
-from .gemini import GeminiProvider
-from .groq import GroqProvider
-from .sambanova import SambanovaProvider
-from .ollama import OllamaProvider
+import importlib
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .gemini import GeminiProvider
+    from .groq import GroqProvider
+    from .sambanova import SambanovaProvider
+    from .ollama import OllamaProvider
+
+# Provider class -> defining submodule
+_PROVIDER_MODULES = {
+    "GeminiProvider": ".gemini",
+    "GroqProvider": ".groq",
+    "SambanovaProvider": ".sambanova",
+    "OllamaProvider": ".ollama",
+}
 
 __all__ = [
     "GeminiProvider",
@@ -13,3 +29,16 @@ __all__ = [
     "SambanovaProvider",
     "OllamaProvider"
 ]
+
+
+def __getattr__(name: str):
+    module = _PROVIDER_MODULES.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module, __name__), name)
+    globals()[name] = value  # later lookups skip __getattr__
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -2,11 +2,22 @@
 Google Gemini provider with multi-key rotation support.
 """
 
+from functools import lru_cache
 from langchain_google_genai import ChatGoogleGenerativeAI
 from langchain_core.language_models import BaseChatModel
 from ..base import BaseLLMProvider
 
 
+@lru_cache(maxsize=64)
+def _get_gemini(api_key: str, model: str, temperature: float) -> BaseChatModel:
+    """One ChatGoogleGenerativeAI per (key, model, temperature), so its HTTP client is reused."""
+    return ChatGoogleGenerativeAI(
+        model=model,
+        google_api_key=api_key,
+        temperature=temperature
+    )
+
+
 class GeminiProvider(BaseLLMProvider):
     """Google Gemini LLM provider."""
     
@@ -23,13 +34,18 @@ class GeminiProvider(BaseLLMProvider):
             **kwargs: Override model or temperature
             
         Returns:
-            ChatGoogleGenerativeAI instance
+            ChatGoogleGenerativeAI instance (shared across calls with the same arguments)
         """
-        return ChatGoogleGenerativeAI(
-            model=kwargs.get("model", self.model),
-            google_api_key=api_key,
-            temperature=kwargs.get("temperature", self.temperature)
+        return _get_gemini(
+            api_key,
+            kwargs.get("model", self.model),
+            kwargs.get("temperature", self.temperature)
         )
     
+    @staticmethod
+    def reset_cache() -> None:
+        """Drop cached clients (e.g. after a key is revoked); keys must be hashable strings."""
+        _get_gemini.cache_clear()
+    
     def get_provider_name(self) -> str:
         return "gemini"
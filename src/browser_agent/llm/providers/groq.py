@@ -2,11 +2,22 @@
 Groq provider (Llama models) with multi-key rotation support.
 """
 
+from functools import lru_cache
 from langchain_groq import ChatGroq
 from langchain_core.language_models import BaseChatModel
 from ..base import BaseLLMProvider
 
 
+@lru_cache(maxsize=64)
+def _get_groq(api_key: str, model: str, temperature: float) -> BaseChatModel:
+    """One ChatGroq per (key, model, temperature), so its HTTP client is reused."""
+    return ChatGroq(
+        api_key=api_key,
+        model=model,
+        temperature=temperature
+    )
+
+
 class GroqProvider(BaseLLMProvider):
     """Groq LLM provider (Llama 3.3 70B, Llama 3.2 Vision)."""
     
@@ -23,13 +34,18 @@ class GroqProvider(BaseLLMProvider):
             **kwargs: Override model or temperature
             
         Returns:
-            ChatGroq instance
+            ChatGroq instance (shared across calls with the same arguments)
         """
-        return ChatGroq(
-            api_key=api_key,
-            model=kwargs.get("model", self.model),
-            temperature=kwargs.get("temperature", self.temperature)
+        return _get_groq(
+            api_key,
+            kwargs.get("model", self.model),
+            kwargs.get("temperature", self.temperature)
         )
     
+    @staticmethod
+    def reset_cache() -> None:
+        """Drop cached clients (e.g. after a key is revoked); keys must be hashable strings."""
+        _get_groq.cache_clear()
+    
     def get_provider_name(self) -> str:
         return "groq"
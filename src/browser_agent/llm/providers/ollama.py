@@ -2,11 +2,70 @@
 Ollama local provider with availability checking.
 """
 
-import requests
+import ipaddress
+import json
+import os
+import socket
+import time
+from typing import Optional
+from urllib.parse import urlsplit
 from langchain_ollama import ChatOllama
 from langchain_core.language_models import BaseChatModel
 from ..base import BaseLLMProvider
 
+# Probe results are shared across processes for a short while, so back-to-back runs
+# without Ollama don't each wait on the check
+_PROBE_CACHE_PATH = os.path.join(os.path.expanduser("~"), ".cache", "browser_agent", "ollama_probe.json")
+_PROBE_TTL_SECONDS = 60
+
+# A closed loopback port refuses at once, so a short connect timeout is enough there;
+# remote hosts get the original 2s
+_LOOPBACK_TIMEOUT = 0.2
+_REMOTE_TIMEOUT = 2.0
+
+
+def _is_loopback(host: str) -> bool:
+    if host == "localhost":
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False
+
+
+def _load_probe_cache() -> dict:
+    try:
+        with open(_PROBE_CACHE_PATH, "r", encoding="utf-8") as f:
+            entries = json.load(f)
+        return entries if isinstance(entries, dict) else {}
+    except (OSError, ValueError):
+        return {}
+
+
+def _read_probe_cache(base_url: str):
+    """Cached availability for base_url, or None if missing or older than the TTL."""
+    try:
+        entry = _load_probe_cache().get(base_url)
+        if entry and time.time() - entry["checked_at"] < _PROBE_TTL_SECONDS:
+            return bool(entry["available"])
+    except (OSError, ValueError, KeyError, TypeError, AttributeError):
+        pass
+    return None
+
+
+def _write_probe_cache(base_url: str, available: bool) -> None:
+    """Best-effort: record the probe result for other processes, keeping other URLs' entries."""
+    entries = _load_probe_cache()
+    entries[base_url] = {"available": available, "checked_at": time.time()}
+    tmp = f"{_PROBE_CACHE_PATH}.{os.getpid()}.tmp"
+    try:
+        os.makedirs(os.path.dirname(_PROBE_CACHE_PATH), exist_ok=True)
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(entries, f)
+        os.replace(tmp, _PROBE_CACHE_PATH)
+    except OSError:
+        pass
+
 
 class OllamaProvider(BaseLLMProvider):
     """Ollama local LLM provider."""
@@ -20,13 +79,16 @@ class OllamaProvider(BaseLLMProvider):
         self.base_url = base_url
     
     @classmethod
-    def check_availability(cls, base_url: str = "http://localhost:11434", timeout: int = 2) -> bool:
+    def check_availability(cls, base_url: str = "http://localhost:11434", timeout: Optional[float] = None) -> bool:
         """
         Check if Ollama is running locally.
         
+        Uses a TCP connect to the server port (a closed port is refused immediately)
+        and reuses a result younger than 60s recorded by any process.
+        
         Args:
             base_url: Ollama server URL
-            timeout: Connection timeout in seconds
+            timeout: Connection timeout in seconds (default 0.2 for loopback hosts, 2 otherwise)
             
         Returns:
             True if Ollama is available, False otherwise
@@ -34,20 +96,29 @@ class OllamaProvider(BaseLLMProvider):
         if cls._availability_checked:
             return cls._is_available
         
-        try:
-            response = requests.get(base_url, timeout=timeout)
-            if response.status_code == 200:
-                print(">>> [OK] Ollama detected and running.")
+        cached = _read_probe_cache(base_url)
+        if cached is not None:
+            cls._is_available = cached
+        else:
+            try:
+                parts = urlsplit(base_url)
+                host = parts.hostname or "localhost"
+                if timeout is None:
+                    timeout = _LOOPBACK_TIMEOUT if _is_loopback(host) else _REMOTE_TIMEOUT
+                with socket.create_connection((host, parts.port or 11434), timeout=timeout):
+                    pass
                 cls._is_available = True
-            else:
-                print(f">>> [WARN] Ollama returned unexpected status: {response.status_code}")
+            except OSError:
+                cls._is_available = False
+            except Exception as e:
+                print(f">>> [ERROR] Error checking Ollama: {e}")
                 cls._is_available = False
-        except requests.exceptions.ConnectionError:
+            _write_probe_cache(base_url, cls._is_available)
+        
+        if cls._is_available:
+            print(">>> [OK] Ollama detected and running.")
+        else:
             print(">>> [ERROR] Ollama not detected (ConnectionError).")
-            cls._is_available = False
-        except Exception as e:
-            print(f">>> [ERROR] Error checking Ollama: {e}")
-            cls._is_available = False
         
         cls._availability_checked = True
         return cls._is_available
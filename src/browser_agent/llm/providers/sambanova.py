@@ -2,11 +2,22 @@
 SambaNova provider with multi-key rotation support.
 """
 
+from functools import lru_cache
 from langchain_sambanova import ChatSambaNova
 from langchain_core.language_models import BaseChatModel
 from ..base import BaseLLMProvider
 
 
+@lru_cache(maxsize=64)
+def _get_sambanova(api_key: str, model: str, temperature: float) -> BaseChatModel:
+    """One ChatSambaNova per (key, model, temperature), so its HTTP client is reused."""
+    return ChatSambaNova(
+        api_key=api_key,
+        model=model,
+        temperature=temperature
+    )
+
+
 class SambanovaProvider(BaseLLMProvider):
     """SambaNova LLM provider (GPT-OSS 120B)."""
     
@@ -23,13 +34,18 @@ class SambanovaProvider(BaseLLMProvider):
             **kwargs: Override model or temperature
             
         Returns:
-            ChatSambaNova instance
+            ChatSambaNova instance (shared across calls with the same arguments)
         """
-        return ChatSambaNova(
-            api_key=api_key,
-            model=kwargs.get("model", self.model),
-            temperature=kwargs.get("temperature", self.temperature)
+        return _get_sambanova(
+            api_key,
+            kwargs.get("model", self.model),
+            kwargs.get("temperature", self.temperature)
         )
     
+    @staticmethod
+    def reset_cache() -> None:
+        """Drop cached clients (e.g. after a key is revoked); keys must be hashable strings."""
+        _get_sambanova.cache_clear()
+    
     def get_provider_name(self) -> str:
         return "sambanova"
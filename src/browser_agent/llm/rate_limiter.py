@@ -3,60 +3,79 @@ API key rotation and rate limit handling.
 """
 
 import os
-from typing import List, Tuple, Optional
+import re
+import threading
+from collections import deque
+from typing import List, Sequence, Tuple, Optional
 from dotenv import load_dotenv
-import logging
+from browser_agent.observability.logger import get_logger
 
-_logger = logging.getLogger("RateLimiter")
+_logger = get_logger("RateLimiter")
 
-load_dotenv()
+# PROVIDER_API_KEY<n> variables, and the comma-separated PROVIDER_API_KEYS list form
+_KEY_VAR_RE = re.compile(r"^(GOOGLE|GROQ|SAMBANOVA)_API_KEY(S|\d+)$")
 
 
 class APIKeyRotator:
     """Manages API key rotation for rate limit resilience."""
     
     def __init__(self):
-        self._gemini_keys: List[str] = []
-        self._groq_keys: List[str] = []
-        self._sambanova_keys: List[str] = []
+        # Fixed once loaded, so stored as tuples and handed out without copying
+        self._gemini_keys: Tuple[str, ...] = ()
+        self._groq_keys: Tuple[str, ...] = ()
+        self._sambanova_keys: Tuple[str, ...] = ()
         self._load_keys()
     
     def _load_keys(self):
         """Load all API keys from environment variables."""
-        # Load Gemini keys (GOOGLE_API_KEY1 to GOOGLE_API_KEY16)
-        for i in range(1, 17):
-            key = os.getenv(f"GOOGLE_API_KEY{i}")
-            if key:
-                self._gemini_keys.append(key)
-        
-        # Load Groq keys (GROQ_API_KEY1 to GROQ_API_KEY5)
-        for i in range(1, 6):
-            key = os.getenv(f"GROQ_API_KEY{i}")
-            if key:
-                self._groq_keys.append(key)
-        
-        # Load SambaNova keys (SAMBANOVA_API_KEY1 to SAMBANOVA_API_KEY5)
-        for i in range(1, 6):
-            key = os.getenv(f"SAMBANOVA_API_KEY{i}")
-            if key:
-                self._sambanova_keys.append(key)
+        load_dotenv()
+
+        # One pass over the environment; numbered keys are taken in suffix order
+        # (no upper bound), followed by any PROVIDER_API_KEYS entries
+        numbered = {"GOOGLE": [], "GROQ": [], "SAMBANOVA": []}
+        listed = {"GOOGLE": [], "GROQ": [], "SAMBANOVA": []}
+        for name, value in os.environ.items():
+            match = _KEY_VAR_RE.match(name)
+            if not match or not value:
+                continue
+            prefix, suffix = match.groups()
+            if suffix == "S":
+                listed[prefix].extend(k.strip() for k in value.split(",") if k.strip())
+            else:
+                numbered[prefix].append((int(suffix), value))
+
+        def _ordered(prefix: str) -> Tuple[str, ...]:
+            ordered = [key for _, key in sorted(numbered[prefix])] + listed[prefix]
+            return tuple(dict.fromkeys(ordered))
+
+        self._gemini_keys = _ordered("GOOGLE")
+        self._groq_keys = _ordered("GROQ")
+        self._sambanova_keys = _ordered("SAMBANOVA")
+        self._keys_by_provider = {
+            "gemini": self._gemini_keys,
+            "groq": self._groq_keys,
+            "sambanova": self._sambanova_keys,
+        }
         
-        _logger.info(f"Loaded API Keys: Gemini={len(self._gemini_keys)}, Groq={len(self._groq_keys)}, SambaNova={len(self._sambanova_keys)}")
-        print(">>> [Keys] Loaded: Gemini=%d, Groq=%d, SambaNova=%d" % (len(self._gemini_keys), len(self._groq_keys), len(self._sambanova_keys)))
+        _logger.info(
+            "Loaded API Keys: Gemini=%d, Groq=%d, SambaNova=%d",
+            len(self._gemini_keys), len(self._groq_keys), len(self._sambanova_keys),
+            agent="Keys"
+        )
     
-    def get_gemini_keys(self) -> List[str]:
-        """Return all Gemini API keys."""
-        return self._gemini_keys.copy()
+    def get_gemini_keys(self) -> Tuple[str, ...]:
+        """Return all Gemini API keys (a shared, immutable tuple)."""
+        return self._gemini_keys
     
-    def get_groq_keys(self) -> List[str]:
-        """Return all Groq API keys."""
-        return self._groq_keys.copy()
+    def get_groq_keys(self) -> Tuple[str, ...]:
+        """Return all Groq API keys (a shared, immutable tuple)."""
+        return self._groq_keys
     
-    def get_sambanova_keys(self) -> List[str]:
-        """Return all SambaNova API keys."""
-        return self._sambanova_keys.copy()
+    def get_sambanova_keys(self) -> Tuple[str, ...]:
+        """Return all SambaNova API keys (a shared, immutable tuple)."""
+        return self._sambanova_keys
     
-    def get_keys_for_provider(self, provider: str) -> List[str]:
+    def get_keys_for_provider(self, provider: str) -> Tuple[str, ...]:
         """
         Get all keys for a specific provider.
         
@@ -64,33 +83,46 @@ class APIKeyRotator:
             provider: Provider name ('gemini', 'groq', 'sambanova')
             
         Returns:
-            List of API keys for that provider
+            Tuple of API keys for that provider
         """
-        if provider == "gemini":
-            return self.get_gemini_keys()
-        elif provider == "groq":
-            return self.get_groq_keys()
-        elif provider == "sambanova":
-            return self.get_sambanova_keys()
-        else:
-            return []
+        return self._keys_by_provider.get(provider, ())
     
-    def rotate_keys(self, keys: List[str], start_index: int = 0) -> List[str]:
+    def rotate_keys(self, keys: Sequence[str], start_index: int = 0) -> List[str]:
         """
         Rotate keys starting from a specific index.
         
         Args:
-            keys: List of API keys
+            keys: API keys (e.g. a get_*_keys() tuple)
             start_index: Starting index for rotation
             
         Returns:
             Rotated list of keys
         """
         if not keys or start_index == 0:
-            return keys
+            return list(keys)
         
-        return keys[start_index:] + keys[:start_index]
+        rotated = deque(keys)
+        rotated.rotate(-start_index)
+        return list(rotated)
+
+
+# Global singleton, created (and .env read) on first use rather than at import
+_api_key_rotator: Optional[APIKeyRotator] = None
+_api_key_rotator_lock = threading.Lock()
+
+
+def get_api_key_rotator() -> APIKeyRotator:
+    """Return the process-wide APIKeyRotator, loading the keys on the first call."""
+    global _api_key_rotator
+    if _api_key_rotator is None:
+        with _api_key_rotator_lock:
+            if _api_key_rotator is None:
+                _api_key_rotator = APIKeyRotator()
+    return _api_key_rotator
 
 
-# Global singleton instance
-api_key_rotator = APIKeyRotator()
+def __getattr__(name: str):
+    # `api_key_rotator` stays importable as a module attribute but is built lazily (PEP 562)
+    if name == "api_key_rotator":
+        return get_api_key_rotator()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
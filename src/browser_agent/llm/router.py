@@ -4,11 +4,13 @@ Replaces the original LLMConfig class with modular provider system.
 """
 
 import os
-from typing import List, Tuple, Optional
+import threading
+from collections import deque
+from typing import Dict, List, Tuple, Optional
 from langchain_core.language_models import BaseChatModel
 
-from .providers import GeminiProvider, GroqProvider, SambanovaProvider, OllamaProvider
-from .rate_limiter import api_key_rotator
+from . import providers
+from .rate_limiter import get_api_key_rotator
 from browser_agent.observability.logger import get_logger
 
 _logger = get_logger("LLMRouter")
@@ -30,11 +32,70 @@ class LLMRouter:
     def __init__(self):
         if not hasattr(self, '_initialized'):
             _logger.info("Initializing LLM Router...", agent="LLMRouter")
-            self.gemini_provider = GeminiProvider()
-            self.groq_provider = GroqProvider()
-            self.sambanova_provider = SambanovaProvider()
-            self.ollama_provider = OllamaProvider()
+            # Providers are built on first use (see _ensure_providers); Ollama on first request
+            self.gemini_provider = None
+            self.groq_provider = None
+            self.sambanova_provider = None
+            self.ollama_provider = None
+            self._providers_ready = False
+            self._rotation_cache: Dict[Tuple[str, Optional[str]], Tuple[Tuple[str, BaseChatModel], ...]] = {}
+            self._rotation_lock = threading.Lock()
             self._initialized = True
+
+    def _ensure_providers(self):
+        """
+        Build the providers that have keys configured. Runs on the first LLM request,
+        which is also when .env and the API keys are first loaded.
+        """
+        if self._providers_ready:
+            return
+        rotator = get_api_key_rotator()
+        if rotator.get_gemini_keys() and self.gemini_provider is None:
+            self.gemini_provider = providers.GeminiProvider()
+        if rotator.get_groq_keys():
+            self.groq_provider = providers.GroqProvider()
+        if rotator.get_sambanova_keys():
+            self.sambanova_provider = providers.SambanovaProvider()
+        self._providers_ready = True
+
+    def _get_ollama_provider(self):
+        """OllamaProvider, created the first time a rotation asks for it."""
+        if self.ollama_provider is None:
+            self.ollama_provider = providers.OllamaProvider()
+        return self.ollama_provider
+
+    def _get_gemini_provider(self):
+        """GeminiProvider, created on demand for the legacy single-key GOOGLE_API_KEY path."""
+        if self.gemini_provider is None:
+            self.gemini_provider = providers.GeminiProvider()
+        return self.gemini_provider
+
+    def _cached_rotation(self, kind: str, provider: Optional[str], build) -> Tuple[Tuple[str, BaseChatModel], ...]:
+        """
+        Build the rotation for (kind, provider) once per process and reuse it.
+        Empty rotations are not cached so newly added keys are picked up on retry.
+        """
+        key = (kind, provider)
+        cached = self._rotation_cache.get(key)
+        if cached is not None:
+            return cached
+        with self._rotation_lock:
+            cached = self._rotation_cache.get(key)
+            if cached is None:
+                self._ensure_providers()
+                cached = tuple(build(provider))
+                if cached:
+                    self._rotation_cache[key] = cached
+        return cached
+
+    @staticmethod
+    def _rotate(rotation: Tuple[Tuple[str, BaseChatModel], ...], start_index: int) -> List[Tuple[str, BaseChatModel]]:
+        """Return a fresh list starting at start_index (wrapping around)."""
+        if start_index > 0 and len(rotation) > 1:
+            rotated = deque(rotation)
+            rotated.rotate(-start_index)
+            return list(rotated)
+        return list(rotation)
     
     def get_main_llm_with_rotation(
         self, 
@@ -51,55 +112,58 @@ class LLMRouter:
         Returns:
             List of (model_name, llm_instance) tuples to try in order
         """
+        rotation_list = self._cached_rotation("main", provider, self._build_main_rotation)
+
+        if not rotation_list:
+            provider_msg = f" for provider '{provider}'" if provider else ""
+            raise ValueError(f"No valid API keys found for main LLM rotation{provider_msg}")
+        
+        # Rotate based on start_index
+        return self._rotate(rotation_list, start_index)
+
+    def _build_main_rotation(self, provider: Optional[str]) -> List[Tuple[str, BaseChatModel]]:
+        """Instantiate every configured text model for provider, in priority order."""
         rotation_list = []
         
         # Add Gemini keys (if no provider specified or provider="gemini")
-        if provider is None or provider == "gemini":
-            gemini_keys = api_key_rotator.get_gemini_keys()
+        if self.gemini_provider is not None and provider in (None, "gemini"):
+            gemini_keys = get_api_key_rotator().get_gemini_keys()
             for idx, key in enumerate(gemini_keys, start=1):
                 try:
                     llm = self.gemini_provider.get_model(api_key=key)
                     rotation_list.append((f"gemini_llm{idx}", llm))
                 except Exception as e:
-                    print(f"[ERROR] Failed to initialize gemini_llm{idx}: {e}")
+                    _logger.warning("Failed to initialize gemini_llm%s: %s", idx, e, agent="LLMRouter")
         
         # Add Groq keys (if no provider specified or provider="groq")
-        if provider is None or provider == "groq":
-            groq_keys = api_key_rotator.get_groq_keys()
+        if self.groq_provider is not None and provider in (None, "groq"):
+            groq_keys = get_api_key_rotator().get_groq_keys()
             for idx, key in enumerate(groq_keys, start=1):
                 try:
                     # Use llama-4-scout for tool calling (planner uses create_tool_calling_agent)
                     llm = self.groq_provider.get_model(api_key=key, model="meta-llama/llama-4-scout-17b-16e-instruct")
                     rotation_list.append((f"groq_llm{idx}", llm))
                 except Exception as e:
-                    print(f"[ERROR] Failed to initialize groq_llm{idx}: {e}")
+                    _logger.warning("Failed to initialize groq_llm%s: %s", idx, e, agent="LLMRouter")
         
         # Add SambaNova keys (if no provider specified or provider="sambanova")
-        if provider is None or provider == "sambanova":
-            sambanova_keys = api_key_rotator.get_sambanova_keys()
+        if self.sambanova_provider is not None and provider in (None, "sambanova"):
+            sambanova_keys = get_api_key_rotator().get_sambanova_keys()
             for idx, key in enumerate(sambanova_keys, start=1):
                 try:
                     llm = self.sambanova_provider.get_model(api_key=key)
                     rotation_list.append((f"sambanova{idx}", llm))
                 except Exception as e:
-                    print(f"[ERROR] Failed to initialize sambanova{idx}: {e}")
+                    _logger.warning("Failed to initialize sambanova%s: %s", idx, e, agent="LLMRouter")
         
         # Add Ollama (if provider="ollama")
         if provider == "ollama":
-            if OllamaProvider.check_availability():
+            if providers.OllamaProvider.check_availability():
                 try:
-                    llm = self.ollama_provider.get_model()
+                    llm = self._get_ollama_provider().get_model()
                     rotation_list.append(("ollama_text", llm))
                 except Exception as e:
-                    print(f"[ERROR] Failed to initialize Ollama text: {e}")
-        
-        if not rotation_list:
-            provider_msg = f" for provider '{provider}'" if provider else ""
-            raise ValueError(f"No valid API keys found for main LLM rotation{provider_msg}")
-        
-        # Rotate based on start_index
-        if start_index > 0:
-            rotation_list = rotation_list[start_index:] + rotation_list[:start_index]
+                    _logger.warning("Failed to initialize Ollama text: %s", e, agent="LLMRouter")
         
         return rotation_list
     
@@ -123,21 +187,31 @@ class LLMRouter:
         Returns:
             List of (model_name, llm_instance) tuples
         """
+        rotation_list = self._cached_rotation("execution", provider, self._build_execution_rotation)
+
+        if not rotation_list:
+            provider_msg = f" for provider '{provider}'" if provider else ""
+            raise ValueError(f"No valid API keys found for execution LLM rotation{provider_msg}")
+        
+        return self._rotate(rotation_list, start_index)
+
+    def _build_execution_rotation(self, provider: Optional[str]) -> List[Tuple[str, BaseChatModel]]:
+        """Instantiate every configured tool-calling model for provider, in priority order."""
         rotation_list = []
         
         # Gemini (tool calling works natively)
-        if provider is None or provider == "gemini":
-            gemini_keys = api_key_rotator.get_gemini_keys()
+        if self.gemini_provider is not None and provider in (None, "gemini"):
+            gemini_keys = get_api_key_rotator().get_gemini_keys()
             for idx, key in enumerate(gemini_keys, start=1):
                 try:
                     llm = self.gemini_provider.get_model(api_key=key)
                     rotation_list.append((f"gemini_llm{idx}", llm))
                 except Exception as e:
-                    print(f"[ERROR] Failed to initialize gemini_llm{idx}: {e}")
+                    _logger.warning("Failed to initialize gemini_llm%s: %s", idx, e, agent="LLMRouter")
         
         # Groq — use Llama 4 Scout for tool calling (confirmed working)
-        if provider is None or provider == "groq":
-            groq_keys = api_key_rotator.get_groq_keys()
+        if self.groq_provider is not None and provider in (None, "groq"):
+            groq_keys = get_api_key_rotator().get_groq_keys()
             for idx, key in enumerate(groq_keys, start=1):
                 try:
                     llm = self.groq_provider.get_model(
@@ -146,33 +220,26 @@ class LLMRouter:
                     )
                     rotation_list.append((f"groq_tool{idx}", llm))
                 except Exception as e:
-                    print(f"[ERROR] Failed to initialize groq_tool{idx}: {e}")
+                    _logger.warning("Failed to initialize groq_tool%s: %s", idx, e, agent="LLMRouter")
         
         # SambaNova
-        if provider is None or provider == "sambanova":
-            sambanova_keys = api_key_rotator.get_sambanova_keys()
+        if self.sambanova_provider is not None and provider in (None, "sambanova"):
+            sambanova_keys = get_api_key_rotator().get_sambanova_keys()
             for idx, key in enumerate(sambanova_keys, start=1):
                 try:
                     llm = self.sambanova_provider.get_model(api_key=key)
                     rotation_list.append((f"sambanova{idx}", llm))
                 except Exception as e:
-                    print(f"[ERROR] Failed to initialize sambanova{idx}: {e}")
+                    _logger.warning("Failed to initialize sambanova%s: %s", idx, e, agent="LLMRouter")
         
         # Ollama
         if provider == "ollama":
-            if OllamaProvider.check_availability():
+            if providers.OllamaProvider.check_availability():
                 try:
-                    llm = self.ollama_provider.get_model()
+                    llm = self._get_ollama_provider().get_model()
                     rotation_list.append(("ollama_text", llm))
                 except Exception as e:
-                    print(f"[ERROR] Failed to initialize Ollama text: {e}")
-        
-        if not rotation_list:
-            provider_msg = f" for provider '{provider}'" if provider else ""
-            raise ValueError(f"No valid API keys found for execution LLM rotation{provider_msg}")
-        
-        if start_index > 0:
-            rotation_list = rotation_list[start_index:] + rotation_list[:start_index]
+                    _logger.warning("Failed to initialize Ollama text: %s", e, agent="LLMRouter")
         
         return rotation_list
     
@@ -190,39 +257,44 @@ class LLMRouter:
         Returns:
             List of (model_name, llm_instance) tuples to try in order
         """
+        rotation_list = self._cached_rotation("vision", None, self._build_vision_rotation)
+
+        if not rotation_list:
+            raise ValueError("No valid vision LLM available (Gemini or Groq)")
+        
+        # Rotate based on start_index (only affects Groq keys if Ollama failed)
+        return self._rotate(rotation_list, start_index)
+
+    def _build_vision_rotation(self, provider: Optional[str] = None) -> List[Tuple[str, BaseChatModel]]:
+        """Instantiate every configured vision model, in priority order."""
         rotation_list = []
 
         # Gemini Flash (primary vision model — multimodal, supports text + image natively)
-        gemini_keys = api_key_rotator.get_gemini_keys()
-        for idx, key in enumerate(gemini_keys, start=1):
-            try:
-                llm = self.gemini_provider.get_model(
-                    api_key=key,
-                    model="gemini-2.5-flash"
-                )
-                rotation_list.append((f"gemini_vision{idx}", llm))
-            except Exception as e:
-                print(f"[ERROR] Failed to initialize gemini_vision{idx}: {e}")
+        if self.gemini_provider is not None:
+            gemini_keys = get_api_key_rotator().get_gemini_keys()
+            for idx, key in enumerate(gemini_keys, start=1):
+                try:
+                    llm = self.gemini_provider.get_model(
+                        api_key=key,
+                        model="gemini-2.5-flash"
+                    )
+                    rotation_list.append((f"gemini_vision{idx}", llm))
+                except Exception as e:
+                    _logger.warning("Failed to initialize gemini_vision%s: %s", idx, e, agent="LLMRouter")
 
         # Groq vision as fallback
-        groq_keys = api_key_rotator.get_groq_keys()
-        for idx, key in enumerate(groq_keys, start=1):
-            try:
-                llm = self.groq_provider.get_model(
-                    api_key=key,
-                    model="llama-3.2-90b-vision-preview"
-                )
-                rotation_list.append((f"groq_llm{idx}_vision", llm))
-            except Exception as e:
-                print(f"[ERROR] Failed to initialize groq_llm{idx} vision: {e}")
+        if self.groq_provider is not None:
+            groq_keys = get_api_key_rotator().get_groq_keys()
+            for idx, key in enumerate(groq_keys, start=1):
+                try:
+                    llm = self.groq_provider.get_model(
+                        api_key=key,
+                        model="llama-3.2-90b-vision-preview"
+                    )
+                    rotation_list.append((f"groq_llm{idx}_vision", llm))
+                except Exception as e:
+                    _logger.warning("Failed to initialize groq_llm%s vision: %s", idx, e, agent="LLMRouter")
 
-        if not rotation_list:
-            raise ValueError("No valid vision LLM available (Gemini or Groq)")
-        
-        # Rotate based on start_index (only affects Groq keys if Ollama failed)
-        if start_index > 0 and len(rotation_list) > 1:
-            rotation_list = rotation_list[start_index:] + rotation_list[:start_index]
-        
         return rotation_list
     
     def get_main_llm(self) -> BaseChatModel:
@@ -230,20 +302,22 @@ class LLMRouter:
         Legacy method: Returns the first Gemini LLM (no rotation).
         For backward compatibility only.
         """
+        self._ensure_providers()
         api_key = os.getenv("GOOGLE_API_KEY")
         if not api_key:
             raise ValueError("CRITICAL: No Google API Key found (checked 'GOOGLE_API_KEY'). Please set it in .env")
-        return self.gemini_provider.get_model(api_key=api_key)
+        return self._get_gemini_provider().get_model(api_key=api_key)
     
     def get_vision_llm(self) -> BaseChatModel:
         """
         Legacy method: Returns Gemini vision LLM (no rotation).
         For backward compatibility only.
         """
+        self._ensure_providers()
         api_key = os.getenv("GOOGLE_API_KEY1") or os.getenv("GOOGLE_API_KEY")
         if not api_key:
             raise ValueError("CRITICAL: No Gemini API Key found. Set GOOGLE_API_KEY1 in .env")
-        return self.gemini_provider.get_model(api_key=api_key, model="gemini-2.5-flash")
+        return self._get_gemini_provider().get_model(api_key=api_key, model="gemini-2.5-flash")
 
 
 # Global singleton instance (backward compatibility with original LLMConfig)
@@ -260,7 +334,7 @@ def validate_config():
         print(f"[ERROR] Main LLM Config Error: {e}")
 
     # Check Vision
-    is_ollama = OllamaProvider.check_availability()
+    is_ollama = providers.OllamaProvider.check_availability()
     if not is_ollama:
         print("[WARN]  Ollama not available. Checking Groq fallback...")
         try:
@@ -2,10 +2,43 @@
 Base memory interfaces and configuration.
 """
 
+import json
+import os
+import sqlite3
 from abc import ABC, abstractmethod
 from typing import Any, Dict, List, Optional
 from dataclasses import dataclass
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def dumps_json(data: Any) -> bytes:
+    """Compact UTF-8 JSON for the file-backed stores; orjson when installed."""
+    if orjson is not None:
+        return orjson.dumps(data, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS)
+    return json.dumps(data, ensure_ascii=False).encode("utf-8")
+
+
+def loads_json(raw: bytes) -> Any:
+    """Parse bytes written by dumps_json (or older pretty-printed files)."""
+    if orjson is not None:
+        return orjson.loads(raw)
+    return json.loads(raw)
+
+
+def connect_sqlite(path) -> sqlite3.Connection:
+    """
+    Autocommit connection in WAL mode for the single-file store backend.
+    Shareable across threads; callers serialize access with their own lock.
+    """
+    conn = sqlite3.connect(os.fspath(path), isolation_level=None, check_same_thread=False)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
+
 
 @dataclass
 class MemoryConfig:
@@ -14,6 +47,10 @@ class MemoryConfig:
     collection_name: str = "agent_memory"
     embedding_model: str = "all-MiniLM-L6-v2"
     max_history_length: int = 100
+    pickle_values: bool = False
+    """LLMCache: store values JSON can't represent in a pickle sidecar instead of failing"""
+    backend: str = "files"
+    """LLMCache/SessionStore storage: "files" (one JSON file per entry) or "sqlite" (one database)"""
 
 
 class BaseMemory(ABC):
@@ -2,21 +2,62 @@
 LLM response caching to reduce API calls and cost.
 """
 
-import json
+import atexit
+import bisect
 import hashlib
+import os
+import pickle
+import struct
+import threading
 import time
-from typing import Any, Dict, List, Optional
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple
 from pathlib import Path
 
-from .base import BaseMemory, MemoryConfig
+from .base import BaseMemory, MemoryConfig, connect_sqlite, dumps_json, loads_json
+
+# xxh128 is several times faster than MD5 on long prompts; the key needs no
+# cryptographic strength, and retrieve() checks the stored key anyway
+try:
+    import xxhash
+except ImportError:
+    xxhash = None
+
+
+@lru_cache(maxsize=4096)
+def _key_digest(key: str) -> str:
+    """64-bit hex digest of a cache key; memoized since retry loops reuse prompts."""
+    raw = key.encode("utf-8", "surrogatepass")
+    if xxhash is not None:
+        return xxhash.xxh128_hexdigest(raw)[:16]
+    return hashlib.md5(raw).hexdigest()[:16]
+
+
+# One index.bin record: entry expiry time (timestamp + ttl) and its 16-hex-char digest
+_INDEX_RECORD = struct.Struct("<d16s")
+_HEX_DIGITS = frozenset("0123456789abcdef")
+
+
+def _is_digest(name: str) -> bool:
+    """True if name has the shape _key_digest() produces."""
+    return len(name) == 16 and _HEX_DIGITS.issuperset(name)
 
 
 class LLMCache(BaseMemory):
     """
     Cache for LLM responses.
-    Uses file-based storage with hash-based keys.
+    Uses file-based storage with hash-based keys, fronted by a bounded
+    in-process LRU so repeat lookups in one run skip the disk. Files are
+    written by a background thread; call flush() to wait for them. A
+    expiry-sorted index (index.bin) lets clear_expired() touch only
+    expired entries instead of listing the directory. Processes sharing a
+    cache directory merge their index into index.bin on save, but that
+    merge is not atomic; use the "sqlite" backend for heavy concurrent use.
     """
     
+    MEMORY_CACHE_SIZE = 512
+    
     def __init__(self, config: Optional[MemoryConfig] = None, ttl_seconds: int = 3600):
         """
         Initialize LLM cache.
@@ -29,10 +70,196 @@ class LLMCache(BaseMemory):
         self.cache_dir = Path(self.config.persist_directory) / "llm_cache"
         self.cache_dir.mkdir(parents=True, exist_ok=True)
         self.ttl = ttl_seconds
+        # Entry paths are built by concatenation rather than Path division per call
+        self._cache_prefix = str(self.cache_dir) + os.sep
+        # digest -> (expires_at, key, value), most recently used last
+        self._mem: "OrderedDict[str, Tuple[float, str, Any]]" = OrderedDict()
+        self._mem_lock = threading.Lock()
+        # Background writer: path -> (json bytes, pickle bytes or None); a rewrite of
+        # the same entry before it is flushed replaces the queued one
+        self._pending: Dict[str, Tuple[bytes, Optional[bytes]]] = {}
+        self._write_cond = threading.Condition()
+        self._writing = False
+        self._writer: Optional[threading.Thread] = None
+        # Held while files are written or removed, so a delete can't race a queued write
+        self._io_lock = threading.Lock()
+        # Optional single-file backend: one WAL-mode SQLite table instead of a file per entry
+        self._db = None
+        if self.config.backend == "sqlite":
+            self._db = connect_sqlite(self.cache_dir / "cache.db")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS cache ("
+                "hash_key TEXT PRIMARY KEY, payload BLOB NOT NULL, pickled BLOB, "
+                "ts REAL NOT NULL, ttl REAL NOT NULL)"
+            )
+            self._db.execute("CREATE INDEX IF NOT EXISTS cache_expiry ON cache(ts + ttl)")
+        # File backend expiry index: (expires_at, digest) sorted by expiry, plus each
+        # live digest's current expiry. Expiry is stored rather than the write time so
+        # entries written with different TTLs still expire in index order. Rewritten or
+        # deleted entries leave their old record behind as a tombstone until the next
+        # compaction.
+        self._index: List[Tuple[float, str]] = []
+        self._index_expiry: Dict[str, float] = {}
+        # Digests removed since the last save (-> expiry of the removed record), so
+        # merging index.bin back in doesn't resurrect them
+        self._index_removed: Dict[str, float] = {}
+        self._index_reset = False
+        self._index_lock = threading.Lock()
+        self._index_dirty = False
+        self._index_path = str(self.cache_dir / "index.bin")
+        if self._db is None:
+            self._load_index()
+    
+    def _read_index_file(self) -> Optional[List[Tuple[float, str]]]:
+        """Records in index.bin, or None if it is missing or unreadable."""
+        try:
+            with open(self._index_path, 'rb') as f:
+                records = [(expires_at, digest.decode("ascii")) for expires_at, digest in _INDEX_RECORD.iter_unpack(f.read())]
+        except (OSError, struct.error, UnicodeDecodeError):
+            return None
+        return [r for r in records if _is_digest(r[1])]
+    
+    def _load_index(self) -> None:
+        """Read index.bin, rebuilding it from the entry files if it is missing or unreadable."""
+        records = self._read_index_file()
+        if records is None:
+            records = []
+            with os.scandir(self.cache_dir) as it:
+                for entry in it:
+                    if not entry.name.endswith(".json"):
+                        continue
+                    if _is_digest(entry.name[:-5]):
+                        records.append((self._entry_expiry(entry), entry.name[:-5]))
+                    else:
+                        # Named by an older key scheme, so no lookup can reach it any more
+                        self._unlink_entry(entry.path)
+            self._index_dirty = True
+        records.sort()
+        self._index = records
+        # Ascending order, so a digest ends up mapped to its latest expiry
+        self._index_expiry = {digest: expires_at for expires_at, digest in records}
+    
+    def _entry_expiry(self, entry: os.DirEntry) -> float:
+        """Expiry time of an entry file, from its stored timestamp and ttl (mtime if unreadable)."""
+        try:
+            with open(entry.path, 'rb') as f:
+                data = loads_json(f.read())
+            return data["timestamp"] + data.get("ttl", self.ttl)
+        except Exception:
+            return entry.stat().st_mtime + self.ttl
+    
+    def _index_add(self, digest: str, expires_at: float) -> None:
+        with self._index_lock:
+            bisect.insort(self._index, (expires_at, digest))
+            self._index_expiry[digest] = expires_at
+            self._index_dirty = True
+            self._compact_index()
+    
+    def _index_remove(self, digest: str) -> None:
+        with self._index_lock:
+            expires_at = self._index_expiry.pop(digest, None)
+            if expires_at is not None:
+                self._index_removed[digest] = expires_at
+                self._index_dirty = True
+                self._compact_index()
+    
+    def _compact_index(self) -> None:
+        """Drop tombstones once they outnumber live records. Caller holds _index_lock."""
+        if len(self._index) > 2 * len(self._index_expiry) + 64:
+            self._index = [r for r in self._index if self._index_expiry.get(r[1]) == r[0]]
+    
+    def _save_index(self) -> None:
+        """
+        Persist the live index records to index.bin if they changed, first merging in
+        records other processes saved there since this one loaded it.
+        """
+        with self._index_lock:
+            if not self._index_dirty:
+                return
+            if not self._index_reset:
+                for expires_at, digest in self._read_index_file() or ():
+                    if expires_at > self._index_expiry.get(digest, self._index_removed.get(digest, -1.0)):
+                        self._index_expiry[digest] = expires_at
+            self._index = sorted((expires_at, digest) for digest, expires_at in self._index_expiry.items())
+            self._atomic_write(
+                self._index_path,
+                b"".join(_INDEX_RECORD.pack(expires_at, digest.encode("ascii")) for expires_at, digest in self._index)
+            )
+            self._index_dirty = False
+            self._index_removed = {}
+            self._index_reset = False
+    
+    def _mem_put(self, key: str, value: Any, expires_at: float) -> None:
+        """Insert or refresh an in-memory entry, evicting the least recently used."""
+        with self._mem_lock:
+            digest = _key_digest(key)
+            self._mem[digest] = (expires_at, key, value)
+            self._mem.move_to_end(digest)
+            if len(self._mem) > self.MEMORY_CACHE_SIZE:
+                self._mem.popitem(last=False)
+    
+    def _mem_pop(self, key: str) -> None:
+        with self._mem_lock:
+            self._mem.pop(_key_digest(key), None)
+    
+    def _enqueue_write(self, cache_file: str, payload: bytes, pickled: Optional[bytes]) -> None:
+        """Queue an entry for the writer thread, starting it on first use."""
+        with self._write_cond:
+            self._pending[cache_file] = (payload, pickled)
+            if self._writer is None:
+                self._writer = threading.Thread(target=self._write_loop, name="LLMCacheWriter", daemon=True)
+                self._writer.start()
+                atexit.register(self.flush)
+            self._write_cond.notify_all()
+    
+    def _write_loop(self) -> None:
+        """Writer thread: drain queued entries in batches."""
+        while True:
+            with self._write_cond:
+                while not self._pending:
+                    self._write_cond.wait()
+            with self._io_lock:
+                with self._write_cond:
+                    batch, self._pending = self._pending, {}
+                    self._writing = True
+                for cache_file, (payload, pickled) in batch.items():
+                    try:
+                        if pickled is not None:
+                            self._atomic_write(cache_file[:-5] + ".pkl", pickled)
+                        self._atomic_write(cache_file, payload)
+                    except Exception as e:
+                        print(f"Error storing in cache: {e}")
+                with self._write_cond:
+                    self._writing = False
+                    self._write_cond.notify_all()
+    
+    @staticmethod
+    def _atomic_write(path: str, data: bytes) -> None:
+        """Write via a temp file and rename, so readers never see a partial entry."""
+        tmp = path + ".tmp"
+        with open(tmp, 'wb') as f:
+            f.write(data)
+        os.replace(tmp, path)
+    
+    def _pending_entry(self, cache_file: str) -> Optional[Tuple[bytes, Optional[bytes]]]:
+        with self._write_cond:
+            return self._pending.get(cache_file)
+    
+    def flush(self) -> None:
+        """Block until every queued entry has been written to disk, then save the index."""
+        with self._write_cond:
+            while self._pending or self._writing:
+                self._write_cond.wait()
+        if self._db is None:
+            self._save_index()
     
     def _hash_key(self, key: str) -> str:
-        """Generate hash for cache key."""
-        return hashlib.md5(key.encode()).hexdigest()
+        """Generate hash for cache key (64 bits, as 16 hex chars)."""
+        return _key_digest(key)
+    
+    def _entry_path(self, key: str) -> str:
+        """Path of the JSON file for key."""
+        return self._cache_prefix + _key_digest(key) + ".json"
     
     def store(self, key: str, value: Any, metadata: Optional[Dict] = None) -> bool:
         """
@@ -47,8 +274,7 @@ class LLMCache(BaseMemory):
             True if successful
         """
         try:
-            hash_key = self._hash_key(key)
-            cache_file = self.cache_dir / f"{hash_key}.json"
+            cache_file = self._entry_path(key)
             
             data = {
                 "key": key,
@@ -58,9 +284,29 @@ class LLMCache(BaseMemory):
                 "ttl": self.ttl
             }
             
-            with open(cache_file,'w') as f:
-                json.dump(data, f, indent=2)
+            pickled = None
+            try:
+                payload = dumps_json(data)
+            except TypeError:
+                if not self.config.pickle_values:
+                    raise
+                # Not JSON-representable: keep the value in a pickle sidecar
+                pickled = pickle.dumps(value, protocol=5)
+                data["value"] = None
+                data["pickled"] = True
+                payload = dumps_json(data)
             
+            if self._db is not None:
+                with self._io_lock:
+                    self._db.execute(
+                        "INSERT OR REPLACE INTO cache VALUES (?, ?, ?, ?, ?)",
+                        (_key_digest(key), payload, pickled, data["timestamp"], self.ttl)
+                    )
+            else:
+                # Serialized here so errors surface to the caller; the file write is queued
+                self._enqueue_write(cache_file, payload, pickled)
+                self._index_add(_key_digest(key), data["timestamp"] + self.ttl)
+            self._mem_put(key, value, data["timestamp"] + self.ttl)
             return True
         except Exception as e:
             print(f"Error storing in cache: {e}")
@@ -76,28 +322,88 @@ class LLMCache(BaseMemory):
         Returns:
             Cached response or None if expired/not found
         """
+        digest = _key_digest(key)
+        with self._mem_lock:
+            hit = self._mem.get(digest)
+            if hit is not None and hit[1] == key:
+                if time.time() <= hit[0]:
+                    self._mem.move_to_end(digest)
+                    return hit[2]
+                del self._mem[digest]
+        
         try:
-            hash_key = self._hash_key(key)
-            cache_file = self.cache_dir / f"{hash_key}.json"
+            cache_file = self._entry_path(key)
             
-            if not cache_file.exists():
-                return None
+            if self._db is not None:
+                with self._io_lock:
+                    pending = self._db.execute(
+                        "SELECT payload, pickled FROM cache WHERE hash_key = ?", (digest,)
+                    ).fetchone()
+                if pending is None:
+                    return None
+            else:
+                pending = self._pending_entry(cache_file)
+            if pending is not None:
+                data = loads_json(pending[0])
+            else:
+                try:
+                    with open(cache_file, 'rb') as f:
+                        data = loads_json(f.read())
+                except FileNotFoundError:
+                    return None
             
-            with open(cache_file, 'r') as f:
-                data = json.load(f)
+            # Truncated hashes can collide; never serve another prompt's response
+            if data.get("key") != key:
+                return None
             
             # Check TTL
             age = time.time() - data.get("timestamp", 0)
             if age > data.get("ttl", self.ttl):
                 # Expired - delete
-                cache_file.unlink()
+                self._drop(key)
                 return None
             
-            return data.get("value")
+            if data.get("pickled"):
+                if pending is not None:
+                    value = pickle.loads(pending[1])
+                else:
+                    with open(cache_file[:-5] + ".pkl", 'rb') as f:
+                        value = pickle.load(f)
+            else:
+                value = data.get("value")
+            self._mem_put(key, value, data.get("timestamp", 0) + data.get("ttl", self.ttl))
+            return value
         except Exception as e:
             print(f"Error retrieving from cache: {e}")
             return None
     
+    def _drop(self, key: str) -> None:
+        """Remove key's stored entry from whichever backend is in use."""
+        if self._db is not None:
+            with self._io_lock:
+                self._db.execute("DELETE FROM cache WHERE hash_key = ?", (_key_digest(key),))
+        else:
+            self._index_remove(_key_digest(key))
+            self._unlink_entry(self._entry_path(key))
+    
+    def _unlink_entry(self, cache_file) -> bool:
+        """
+        Remove an entry's JSON file (str or Path), its pickle sidecar and any queued write.
+        Returns whether the JSON file existed.
+        """
+        json_path = os.fspath(cache_file)
+        removed = False
+        with self._io_lock:
+            with self._write_cond:
+                self._pending.pop(json_path, None)
+            for path in (json_path, json_path[:-5] + ".pkl"):
+                try:
+                    os.unlink(path)
+                    removed = removed or path is json_path
+                except FileNotFoundError:
+                    pass
+        return removed
+    
     def search(self, query: str, limit: int = 5) -> List[Any]:
         """
         Search cache (not implemented for LLM cache).
@@ -122,10 +428,8 @@ class LLMCache(BaseMemory):
             True if successful
         """
         try:
-            hash_key = self._hash_key(key)
-            cache_file = self.cache_dir / f"{hash_key}.json"
-            if cache_file.exists():
-                cache_file.unlink()
+            self._mem_pop(key)
+            self._drop(key)
             return True
         except Exception as e:
             print(f"Error deleting from cache: {e}")
@@ -139,8 +443,26 @@ class LLMCache(BaseMemory):
             True if successful
         """
         try:
-            for cache_file in self.cache_dir.glob("*.json"):
-                cache_file.unlink()
+            with self._mem_lock:
+                self._mem.clear()
+            if self._db is not None:
+                with self._io_lock:
+                    self._db.execute("DELETE FROM cache")
+                return True
+            with self._io_lock:
+                with self._write_cond:
+                    self._pending.clear()
+                for cache_file in self.cache_dir.glob("*.json"):
+                    cache_file.unlink()
+                for sidecar in self.cache_dir.glob("*.pkl"):
+                    sidecar.unlink()
+            with self._index_lock:
+                self._index = []
+                self._index_expiry = {}
+                self._index_removed = {}
+                self._index_reset = True
+                self._index_dirty = True
+            self._save_index()
             return True
         except Exception as e:
             print(f"Error clearing cache: {e}")
@@ -154,15 +476,28 @@ class LLMCache(BaseMemory):
             Number of entries cleared
         """
         cleared = 0
+        now = time.time()
+        with self._mem_lock:
+            for digest in [d for d, (expires_at, _, _) in self._mem.items() if expires_at < now]:
+                del self._mem[digest]
         try:
-            for cache_file in self.cache_dir.glob("*.json"):
-                with open(cache_file, 'r') as f:
-                    data = json.load(f)
-                
-                age = time.time() - data.get("timestamp", 0)
-                if age > data.get("ttl", self.ttl):
-                    cache_file.unlink()
+            if self._db is not None:
+                with self._io_lock:
+                    return self._db.execute("DELETE FROM cache WHERE ts + ttl < ?", (now,)).rowcount
+            
+            # The index is sorted by expiry, so the expired entries are a prefix of it
+            with self._index_lock:
+                split = bisect.bisect_left(self._index, (now,))
+                expired = [digest for expires_at, digest in self._index[:split] if self._index_expiry.get(digest) == expires_at]
+                del self._index[:split]
+                for digest in expired:
+                    self._index_removed[digest] = self._index_expiry.pop(digest)
+                if split:
+                    self._index_dirty = True
+            for digest in expired:
+                if self._unlink_entry(self._cache_prefix + digest + ".json"):
                     cleared += 1
+            self._save_index()
             
             return cleared
         except Exception as e:
@@ -0,0 +1,97 @@
+"""
+Embedding model factory for the vector stores.
+
+When `optimum[onnxruntime]` is installed the sentence-transformer is exported to
+ONNX and run through ONNX Runtime, which is several times faster than the default
+PyTorch FP32 path on CPU. Otherwise this falls back to HuggingFaceEmbeddings.
+The export runs once; the ONNX model is saved under ~/.cache/browser_agent/onnx
+and loaded from there afterwards.
+"""
+
+import os
+from typing import List
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+try:
+    import onnxruntime
+    from optimum.onnxruntime import ORTModelForFeatureExtraction
+    from transformers import AutoTokenizer
+    HAS_OPTIMUM = True
+except ImportError:
+    HAS_OPTIMUM = False
+
+_ONNX_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "browser_agent", "onnx")
+
+
+class ONNXEmbeddings(Embeddings):
+    """
+    Sentence-transformer embeddings served by ONNX Runtime.
+    Mean-pools token states and L2-normalizes, matching all-MiniLM-L6-v2's
+    sentence-transformers pipeline.
+    """
+
+    def __init__(self, model_name: str = "all-MiniLM-L6-v2", batch_size: int = 32, max_length: int = 256):
+        repo_id = model_name if "/" in model_name else f"sentence-transformers/{model_name}"
+        provider = (
+            "CUDAExecutionProvider"
+            if "CUDAExecutionProvider" in onnxruntime.get_available_providers()
+            else "CPUExecutionProvider"
+        )
+        export_dir = os.path.join(_ONNX_CACHE_DIR, repo_id.replace("/", "--"))
+        if os.path.isfile(os.path.join(export_dir, "model.onnx")):
+            self.tokenizer = AutoTokenizer.from_pretrained(export_dir)
+            self.model = ORTModelForFeatureExtraction.from_pretrained(export_dir, export=False, provider=provider)
+        else:
+            # First use: the torch -> ONNX export takes seconds, so keep the result
+            self.tokenizer = AutoTokenizer.from_pretrained(repo_id)
+            self.model = ORTModelForFeatureExtraction.from_pretrained(repo_id, export=True, provider=provider)
+            try:
+                self.tokenizer.save_pretrained(export_dir)
+                self.model.save_pretrained(export_dir)
+            except OSError as e:
+                print(f">>> Could not cache ONNX export in {export_dir}: {e}")
+        self.batch_size = batch_size
+        self.max_length = max_length
+
+    def _encode(self, texts: List[str]) -> np.ndarray:
+        inputs = self.tokenizer(
+            texts, padding=True, truncation=True, max_length=self.max_length, return_tensors="np"
+        )
+        hidden = np.asarray(self.model(**inputs).last_hidden_state)
+        mask = inputs["attention_mask"][..., None].astype(hidden.dtype)
+        pooled = (hidden * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+        return pooled / np.clip(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12, None)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """Embed texts in length-sorted batches so padding stays minimal, then restore input order."""
+        if not texts:
+            return []
+        order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+        vectors: List[List[float]] = [None] * len(texts)
+        for start in range(0, len(order), self.batch_size):
+            idx = order[start:start + self.batch_size]
+            for i, vec in zip(idx, self._encode([texts[i] for i in idx])):
+                vectors[i] = vec.tolist()
+        return vectors
+
+    def embed_query(self, text: str) -> List[float]:
+        """Embed a single query string."""
+        return self._encode([text])[0].tolist()
+
+
+def get_embeddings(model_name: str = "all-MiniLM-L6-v2") -> Embeddings:
+    """
+    Return the fastest available embedding backend for model_name.
+    Prefers ONNX Runtime; falls back to HuggingFaceEmbeddings if Optimum is
+    missing or the export fails.
+    """
+    if HAS_OPTIMUM:
+        try:
+            return ONNXEmbeddings(model_name)
+        except Exception as e:
+            print(f">>> ONNX embeddings unavailable ({e}), falling back to HuggingFace")
+
+    from langchain_huggingface import HuggingFaceEmbeddings
+    return HuggingFaceEmbeddings(model_name=model_name)
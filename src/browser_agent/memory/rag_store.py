@@ -0,0 +1,154 @@
+"""
+Shared RAG vector database and its background writer.
+
+Both the orchestration graph and the agents.rag module read and write past
+errors/lessons through this one Chroma client, so there is a single writer
+thread and a single client on ./rag_data.
+"""
+
+import atexit
+import queue
+import threading
+import time
+from typing import List, Optional
+
+from langchain_core.documents import Document
+
+from ..observability.logger import get_logger
+
+try:
+    from langchain_community.vectorstores import Chroma
+    from .embeddings import get_embeddings
+    from .vector_store import maybe_quantize
+    HAS_CHROMADB = True
+except ImportError:
+    HAS_CHROMADB = False
+
+logger = get_logger("RAGStore")
+
+# Fixed retrieval probe for past errors, embedded once when the database loads
+ERROR_PROBE_QUERY = "error failure issue fix"
+
+_vector_db_instance = None
+_error_probe_vec: Optional[List[float]] = None
+_vector_db_lock = threading.Lock()
+
+
+def get_vector_db():
+    """
+    Lazy load the vector database only when needed.
+    This eliminates the startup delay from loading the embedding model and Chroma.
+    Returns None if ChromaDB dependencies are not installed.
+    """
+    global _vector_db_instance, _error_probe_vec
+
+    if not HAS_CHROMADB:
+        return None
+
+    if _vector_db_instance is not None:
+        return _vector_db_instance
+
+    with _vector_db_lock:
+        if _vector_db_instance is None:
+            try:
+                print(">>> Initializing vector database (first use only)...")
+                embeddings = get_embeddings("all-MiniLM-L6-v2")
+                vector_db = maybe_quantize(Chroma(
+                    persist_directory="./rag_data",
+                    embedding_function=embeddings,
+                    collection_name="agent_memories"
+                ))
+                # The error probe is a constant, so embed it once alongside the model load.
+                # Publish the instance last so lock-free readers never see it without the probe.
+                _error_probe_vec = embeddings.embed_query(ERROR_PROBE_QUERY)
+                _vector_db_instance = vector_db
+                print(">>> Vector database initialized successfully.")
+            except Exception as e:
+                print(f"Error loading vector database: {str(e)}")
+                _vector_db_instance = None
+
+    return _vector_db_instance
+
+
+def get_error_probe_vector() -> Optional[List[float]]:
+    """Embedding of ERROR_PROBE_QUERY, or None until the vector database has loaded."""
+    return _error_probe_vec
+
+
+def prewarm_vector_db():
+    """
+    Load the embedding model and vector DB in a background thread so the first
+    retrieval or write finds a ready instance instead of stalling on init.
+    """
+    if _vector_db_instance is None:
+        threading.Thread(target=get_vector_db, name="vector-db-prewarm", daemon=True).start()
+
+
+# RAG writes are fire-and-forget: a single background writer embeds documents in
+# batches (every _RAG_FLUSH_SIZE docs or _RAG_FLUSH_INTERVAL seconds) so the planner
+# never waits on the embedder or the vector store.
+_RAG_QUEUE: "queue.Queue" = queue.Queue(maxsize=64)
+_RAG_FLUSH_SIZE = 8
+_RAG_FLUSH_INTERVAL = 1.0
+_RAG_STOP = object()
+_rag_writer: Optional[threading.Thread] = None
+_rag_writer_lock = threading.Lock()
+
+
+def _write_rag_batch(batch: List[Document]):
+    """Write a batch of RAG documents with a single add_documents call."""
+    vector_db = get_vector_db()
+    if not vector_db or not batch:
+        return
+    try:
+        vector_db.add_documents(batch)
+    except Exception as e:
+        logger.warning("RAG batch write failed (%s docs): %s", len(batch), e, agent="RAG")
+
+
+def _rag_writer_loop():
+    batch: List[Document] = []
+    deadline = 0.0
+    while True:
+        timeout = max(0.0, deadline - time.monotonic()) if batch else None
+        try:
+            doc = _RAG_QUEUE.get(timeout=timeout)
+        except queue.Empty:
+            doc = None
+        if doc is _RAG_STOP:
+            _write_rag_batch(batch)
+            return
+        if doc is not None:
+            if not batch:
+                deadline = time.monotonic() + _RAG_FLUSH_INTERVAL
+            batch.append(doc)
+        if batch and (len(batch) >= _RAG_FLUSH_SIZE or time.monotonic() >= deadline):
+            _write_rag_batch(batch)
+            batch = []
+
+
+def buffer_rag_document(doc: Document):
+    """Hand a document to the background RAG writer. Drops it (with a log line) if the queue is full."""
+    global _rag_writer
+    with _rag_writer_lock:
+        if _rag_writer is None or not _rag_writer.is_alive():
+            _rag_writer = threading.Thread(target=_rag_writer_loop, name="rag-writer", daemon=True)
+            _rag_writer.start()
+    try:
+        _RAG_QUEUE.put_nowait(doc)
+    except queue.Full:
+        logger.warning("RAG write queue full, dropping document", agent="RAG")
+
+
+def flush_rag_buffer():
+    """Stop the background writer after it has written everything still queued."""
+    if _rag_writer is None or not _rag_writer.is_alive():
+        return
+    try:
+        _RAG_QUEUE.put(_RAG_STOP, timeout=5)
+        _rag_writer.join(timeout=10)
+    except queue.Full:
+        logger.warning("RAG writer did not drain before exit", agent="RAG")
+
+
+atexit.register(flush_rag_buffer)
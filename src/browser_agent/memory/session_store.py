@@ -2,19 +2,20 @@
 Session state persistence for browser profiles and workflow state.
 """
 
-import json
 import os
+import threading
 from typing import Any, Dict, List, Optional
 from datetime import datetime
 from pathlib import Path
 
-from .base import BaseMemory, MemoryConfig
+from .base import BaseMemory, MemoryConfig, connect_sqlite, dumps_json, loads_json
 
 
 class SessionStore(BaseMemory):
     """
     Persistent storage for browser sessions and workflow state.
-    Stores session data as JSON files.
+    Stores session data as JSON files, or in one SQLite database when
+    config.backend == "sqlite".
     """
     
     def __init__(self, config: Optional[MemoryConfig] = None):
@@ -27,6 +28,25 @@ class SessionStore(BaseMemory):
         super().__init__(config)
         self.session_dir = Path(self.config.persist_directory) / "sessions"
         self.session_dir.mkdir(parents=True, exist_ok=True)
+        self._db = None
+        self._db_lock = threading.Lock()
+        if self.config.backend == "sqlite":
+            self._db = connect_sqlite(self.session_dir / "sessions.db")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS sessions (session_id TEXT PRIMARY KEY, payload BLOB NOT NULL)"
+            )
+    
+    def _iter_payloads(self):
+        """Raw JSON bytes of every stored session."""
+        if self._db is not None:
+            with self._db_lock:
+                rows = self._db.execute("SELECT payload FROM sessions").fetchall()
+            for (payload,) in rows:
+                yield payload
+            return
+        for session_file in self.session_dir.glob("*.json"):
+            with open(session_file, 'rb') as f:
+                yield f.read()
     
     def store(self, key: str, value: Any, metadata: Optional[Dict] = None) -> bool:
         """
@@ -50,8 +70,13 @@ class SessionStore(BaseMemory):
                 "updated_at": datetime.now().isoformat()
             }
             
-            with open(session_file, 'w') as f:
-                json.dump(data, f, indent=2)
+            if self._db is not None:
+                with self._db_lock:
+                    self._db.execute("INSERT OR REPLACE INTO sessions VALUES (?, ?)", (key, dumps_json(data)))
+                return True
+            
+            with open(session_file, 'wb') as f:
+                f.write(dumps_json(data))
             
             return True
         except Exception as e:
@@ -69,13 +94,18 @@ class SessionStore(BaseMemory):
             Session data or None
         """
         try:
+            if self._db is not None:
+                with self._db_lock:
+                    row = self._db.execute("SELECT payload FROM sessions WHERE session_id = ?", (key,)).fetchone()
+                return loads_json(row[0]).get("data") if row else None
+            
             session_file = self.session_dir / f"{key}.json"
             
             if not session_file.exists():
                 return None
             
-            with open(session_file, 'r') as f:
-                data = json.load(f)
+            with open(session_file, 'rb') as f:
+                data = loads_json(f.read())
             
             return data.get("data")
         except Exception as e:
@@ -95,9 +125,8 @@ class SessionStore(BaseMemory):
         """
         results = []
         try:
-            for session_file in self.session_dir.glob("*.json"):
-                with open(session_file, 'r') as f:
-                    data = json.load(f)
+            for payload in self._iter_payloads():
+                data = loads_json(payload)
                 
                 # Simple search in metadata
                 if query.lower() in str(data.get("metadata", {})).lower():
@@ -122,6 +151,10 @@ class SessionStore(BaseMemory):
             True if successful
         """
         try:
+            if self._db is not None:
+                with self._db_lock:
+                    self._db.execute("DELETE FROM sessions WHERE session_id = ?", (key,))
+                return True
             session_file = self.session_dir / f"{key}.json"
             if session_file.exists():
                 session_file.unlink()
@@ -138,6 +171,10 @@ class SessionStore(BaseMemory):
             True if successful
         """
         try:
+            if self._db is not None:
+                with self._db_lock:
+                    self._db.execute("DELETE FROM sessions")
+                return True
             for session_file in self.session_dir.glob("*.json"):
                 session_file.unlink()
             return True
@@ -152,4 +189,7 @@ class SessionStore(BaseMemory):
         Returns:
             List of session IDs
         """
+        if self._db is not None:
+            with self._db_lock:
+                return [row[0] for row in self._db.execute("SELECT session_id FROM sessions")]
         return [f.stem for f in self.session_dir.glob("*.json")]
@@ -1,15 +1,36 @@
 """
 Vector store memory using ChromaDB for RAG.
-Currently implemented directly in orchestration.py via get_vector_db().
+The agents currently use the shared client in rag_store.py via get_vector_db().
 This module provides a cleaner interface for future refactoring.
 """
 
+import os
 from typing import List, Optional, Dict, Any
-from langchain_huggingface import HuggingFaceEmbeddings
 from langchain_community.vectorstores import Chroma
 from langchain_core.documents import Document
 
 from .base import BaseMemory, MemoryConfig
+from .embeddings import get_embeddings
+
+try:
+    from turbochroma import QuantizedCollection, SQ8Codec
+    HAS_TURBOCHROMA = True
+except ImportError:
+    HAS_TURBOCHROMA = False
+
+
+def maybe_quantize(vector_db):
+    """
+    Swap the Chroma collection for an SQ8 scalar-quantized one (~4x less RAM).
+    Opt-in: requires turbochroma and RAG_QUANTIZE=true; otherwise returns vector_db unchanged.
+    """
+    if not HAS_TURBOCHROMA or os.getenv("RAG_QUANTIZE", "false").lower() not in ("1", "true", "yes"):
+        return vector_db
+    try:
+        vector_db._collection = QuantizedCollection(vector_db._collection, codec=SQ8Codec())
+    except Exception as e:
+        print(f">>> Vector quantization unavailable ({e}), using full-precision collection")
+    return vector_db
 
 
 class VectorStoreMemory(BaseMemory):
@@ -32,12 +53,12 @@ class VectorStoreMemory(BaseMemory):
         """Lazy load vector database."""
         if self._vector_db is None:
             print(">>> Initializing ChromaDB vector store...")
-            embeddings = HuggingFaceEmbeddings(model_name=self.config.embedding_model)
-            self._vector_db = Chroma(
+            embeddings = get_embeddings(self.config.embedding_model)
+            self._vector_db = maybe_quantize(Chroma(
                 persist_directory=self.config.persist_directory,
                 embedding_function=embeddings,
                 collection_name=self.config.collection_name
-            )
+            ))
         return self._vector_db
     
     def store(self, key: str, value: Any, metadata: Optional[Dict] = None) -> bool:
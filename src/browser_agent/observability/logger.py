@@ -4,9 +4,15 @@ Writes to:
   - Console   : INFO+  (brief, clean output)
   - agent.log : DEBUG+ (everything - full execution trace)
   - error.log : ERROR+ (only errors and warnings for quick debugging)
+
+Records are handed to a QueueHandler and written by a QueueListener thread,
+so callers never block on console or file I/O.
 """
 
+import atexit
 import logging
+import logging.handlers
+import queue
 import sys
 import os
 import io
@@ -22,11 +28,67 @@ AGENT_LOG = os.path.join(_LOG_DIR, 'agent.log')
 ERROR_LOG = os.path.join(_LOG_DIR, 'error.log')
 
 
+# ---------------------------------------------------------------------------
+# Shared sinks, drained off the caller thread by a single QueueListener
+# ---------------------------------------------------------------------------
+_log_queue: "queue.Queue" = queue.Queue(-1)
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+def _build_sinks() -> list:
+    """Console (INFO+), agent.log (DEBUG+) and error.log (WARNING+) handlers."""
+    # --- Console handler (INFO+) - clean, brief format ---
+    console_handler = logging.StreamHandler(sys.stdout)
+    console_handler.setLevel(logging.INFO)
+    console_handler.setFormatter(logging.Formatter(
+        '%(asctime)s | %(levelname)-7s | %(name)s | %(message)s',
+        datefmt='%H:%M:%S'
+    ))
+    sinks = [console_handler]
+
+    # --- agent.log handler (DEBUG+) - full execution trace ---
+    try:
+        file_handler = logging.FileHandler(AGENT_LOG, mode='a', encoding='utf-8')
+        file_handler.setLevel(logging.DEBUG)
+        file_handler.setFormatter(logging.Formatter(
+            '%(asctime)s | %(levelname)-7s | %(name)-25s | %(message)s',
+            datefmt='%Y-%m-%d %H:%M:%S'
+        ))
+        sinks.append(file_handler)
+    except Exception as e:
+        sys.stderr.write(f"Could not create agent.log: {e}\n")
+
+    # --- error.log handler (WARNING+) - errors only ---
+    try:
+        error_handler = logging.FileHandler(ERROR_LOG, mode='a', encoding='utf-8')
+        error_handler.setLevel(logging.WARNING)
+        error_handler.setFormatter(logging.Formatter(
+            '%(asctime)s | %(levelname)-7s | %(name)-25s | %(message)s\n'
+            '    %(pathname)s:%(lineno)d',
+            datefmt='%Y-%m-%d %H:%M:%S'
+        ))
+        sinks.append(error_handler)
+    except Exception as e:
+        sys.stderr.write(f"Could not create error.log: {e}\n")
+
+    return sinks
+
+
+def _ensure_listener():
+    """Start the shared QueueListener on first use."""
+    global _listener
+    if _listener is None:
+        _listener = logging.handlers.QueueListener(_log_queue, *_build_sinks(), respect_handler_level=True)
+        _listener.start()
+        atexit.register(_listener.stop)
+
+
 class AgentLogger:
     """
     Structured logger for browser agent.
     Provides context-aware logging with agent names and timestamps.
     Outputs to console (INFO+), agent.log (DEBUG+), and error.log (ERROR+).
+    Message arguments use lazy %-formatting: logger.info("Using %s", model, agent="Planner").
     """
 
     _instances = {}
@@ -37,67 +99,29 @@ class AgentLogger:
 
         # Avoid duplicate handlers
         if not self.logger.handlers:
-            # --- Console handler (INFO+) - clean, brief format ---
-            console_handler = logging.StreamHandler(sys.stdout)
-            console_handler.setLevel(logging.INFO)
-            console_fmt = logging.Formatter(
-                '%(asctime)s | %(levelname)-7s | %(name)s | %(message)s',
-                datefmt='%H:%M:%S'
-            )
-            console_handler.setFormatter(console_fmt)
-            self.logger.addHandler(console_handler)
-
-            # --- agent.log handler (DEBUG+) - full execution trace ---
-            try:
-                file_handler = logging.FileHandler(
-                    AGENT_LOG, mode='a', encoding='utf-8'
-                )
-                file_handler.setLevel(logging.DEBUG)
-                file_fmt = logging.Formatter(
-                    '%(asctime)s | %(levelname)-7s | %(name)-25s | %(message)s',
-                    datefmt='%Y-%m-%d %H:%M:%S'
-                )
-                file_handler.setFormatter(file_fmt)
-                self.logger.addHandler(file_handler)
-            except Exception as e:
-                self.logger.warning(f"Could not create agent.log: {e}")
-
-            # --- error.log handler (WARNING+) - errors only ---
-            try:
-                error_handler = logging.FileHandler(
-                    ERROR_LOG, mode='a', encoding='utf-8'
-                )
-                error_handler.setLevel(logging.WARNING)
-                error_fmt = logging.Formatter(
-                    '%(asctime)s | %(levelname)-7s | %(name)-25s | %(message)s\n'
-                    '    %(pathname)s:%(lineno)d',
-                    datefmt='%Y-%m-%d %H:%M:%S'
-                )
-                error_handler.setFormatter(error_fmt)
-                self.logger.addHandler(error_handler)
-            except Exception as e:
-                self.logger.warning(f"Could not create error.log: {e}")
+            _ensure_listener()
+            self.logger.addHandler(logging.handlers.QueueHandler(_log_queue))
 
     # --- Standard log methods ---
-    def info(self, message: str, agent: Optional[str] = None):
+    def info(self, message: str, *args, agent: Optional[str] = None):
         """Log info message."""
         prefix = f"[{agent}] " if agent else ""
-        self.logger.info(f"{prefix}{message}")
+        self.logger.info(f"{prefix}{message}", *args)
 
-    def warning(self, message: str, agent: Optional[str] = None):
+    def warning(self, message: str, *args, agent: Optional[str] = None):
         """Log warning message."""
         prefix = f"[{agent}] " if agent else ""
-        self.logger.warning(f"{prefix}{message}")
+        self.logger.warning(f"{prefix}{message}", *args)
 
-    def error(self, message: str, agent: Optional[str] = None, exc_info: bool = False):
+    def error(self, message: str, *args, agent: Optional[str] = None, exc_info: bool = False):
         """Log error message."""
         prefix = f"[{agent}] " if agent else ""
-        self.logger.error(f"{prefix}{message}", exc_info=exc_info)
+        self.logger.error(f"{prefix}{message}", *args, exc_info=exc_info)
 
-    def debug(self, message: str, agent: Optional[str] = None):
+    def debug(self, message: str, *args, agent: Optional[str] = None):
         """Log debug message."""
         prefix = f"[{agent}] " if agent else ""
-        self.logger.debug(f"{prefix}{message}")
+        self.logger.debug(f"{prefix}{message}", *args)
 
     # --- Agent lifecycle methods ---
     def agent_start(self, agent_name: str, task: str):
@@ -4,39 +4,32 @@ This is the main workflow engine that coordinates all agents.
 """
 
 import os
+import hashlib
 import json
 import time
 import re
 import sys
 import asyncio
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from functools import lru_cache
+from types import SimpleNamespace
 from urllib.parse import urlparse
 from typing import Optional, Literal, List, Annotated, Sequence
 from dataclasses import field
 
 import dotenv
+# Before the package imports below: several modules read tuning knobs from the
+# environment at import time, and values set in .env must be visible to them
+dotenv.load_dotenv()
 import nest_asyncio
 from pydantic import BaseModel, Field
 from langchain_core.messages import ChatMessage, HumanMessage, BaseMessage, SystemMessage, AIMessage
 from langchain_core.output_parsers import JsonOutputParser
 from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
-try:
-    from langchain.agents import AgentExecutor, create_tool_calling_agent
-except ImportError:
-    # Fallback for newer LangChain versions
-    from langchain_core.agents import AgentExecutor, create_tool_calling_agent
-try:
-    from langchain_tavily import TavilySearch
-except ImportError:
-    from langchain_community.tools.tavily_search import TavilySearchResults as TavilySearch
-try:
-    from langchain_community.vectorstores import Chroma
-    from langchain_huggingface import HuggingFaceEmbeddings
-    HAS_CHROMADB = True
-except ImportError:
-    HAS_CHROMADB = False
 from langchain_core.documents import Document
 from langgraph.graph import StateGraph, START, END, MessagesState
 from langgraph.types import Command
+from playwright.sync_api import Error as PlaywrightError
 import operator
 
 # Import from new modular structure
@@ -64,7 +57,9 @@ from .browser.analysis import (
     observe_page
 )
 from .browser.tools import smart_click, smart_type
-from .core.schemas import Step, SupervisorOutput
+from .core.schemas import SupervisorOutput, parse_supervisor_output
+from .core.utils import extract_json_from_markdown
+from .memory.rag_store import get_vector_db, prewarm_vector_db, get_error_probe_vector, buffer_rag_document
 from .observability.logger import get_logger
 
 logger = get_logger("Orchestration")
@@ -74,65 +69,145 @@ if sys.platform == 'win32':
     asyncio.set_event_loop_policy(asyncio.WindowsProactorEventLoopPolicy())
 
 nest_asyncio.apply()
-dotenv.load_dotenv()
 
+# Agentic plan cache: reuse plan skeletons from semantically similar past goals
+PLAN_CACHE_ENABLED = os.getenv("PLAN_CACHE_ENABLED", "false").lower() in ("1", "true", "yes")
+PLAN_CACHE_THRESHOLD = 0.9
+
+# Static prompt for the output formatting agent
+_FORMATTER_PROMPT = ChatPromptTemplate.from_messages([
+    ("system", "You are a data extraction specialist. \nINSTRUCTIONS:\n{instructions}"),
+    ("human", "RAW DATA:\n{data}")
+])
+
+# Single-pass brace escaping for text embedded in prompt templates
+_BRACE_ESCAPE = str.maketrans({"{": "{{", "}": "}}"})
+
+# Title + leading visible text for the planner's page scan, fetched in a single evaluate
+_PAGE_SNAPSHOT_JS = "() => ({title: document.title, text: (document.body ? document.body.innerText : '').slice(0, 1000)})"
+
+# Executor tools whose observations count as extracted data
+_EXTRACT_TOOLS = frozenset({"scrape_data_using_text", "analyze_using_vision", "extract_and_analyze_selectors"})
+
+# Message types the planner passes through as-is; anything else becomes a HumanMessage
+_HISTORY_MESSAGE_TYPES = (HumanMessage, AIMessage)
+
+# Planner output schema instructions depend only on SupervisorOutput, so build them once
+_PLANNER_PARSER = JsonOutputParser(pydantic_object=SupervisorOutput)
+_PLANNER_INSTRUCTIONS = _PLANNER_PARSER.get_format_instructions().translate(_BRACE_ESCAPE)
+
+# Precompiled output / error classification (one case-insensitive pass each)
+_SHORT_FAIL_RE = re.compile(r"unable|couldn't|execution failed", re.I)
+_EXPLICIT_FAIL_RE = re.compile(r"\s*(?:error|failed)", re.I)
+_NO_ERROR_RE = re.compile(r"no error", re.I)
+_TOOL_ERROR_RE = re.compile(r"error", re.I)
+_TOOL_ERROR_DETAIL_RE = re.compile(r"403|429|failed|denied", re.I)
+_RATE_LIMIT_RE = re.compile(r"429|rate limit|quota|resource_exhausted", re.I)
+_MODEL_ISSUE_RE = re.compile(
+    r"429|413|403|rate limit|quota|resource_exhausted|request too large|permission|denied|billing"
+    r"|404|not found|no longer available|deprecated",
+    re.I
+)
+_PLANNER_RETRY_RE = re.compile(
+    _MODEL_ISSUE_RE.pattern
+    + r"|empty output|extra data|expecting value|jsondecodeerror|does not exist|model_not_found",
+    re.I
+)
+_TOOL_CALL_RETRY_RE = re.compile(
+    r"failed to call a function|tool_call|model_not_found|does not exist"
+    r"|invalid function calling|input should be a valid dictionary",
+    re.I
+)
+
+_PLAN_ADAPT_PROMPT = ChatPromptTemplate.from_messages([
+    ("system",
+     "You adapt a previously successful browser automation plan to a new user goal.\n"
+     "Keep the same agents and step structure, but substitute the specifics of the new goal "
+     "(sites, search terms, values) into every query.\n"
+     "Return ONLY valid JSON.\n{instructions}"),
+    ("human", "NEW GOAL: {goal}\n\nCACHED PLAN:\n{plan}")
+])
 
-def extract_json_from_markdown(text) -> str:
-    """Extract JSON from markdown code blocks or raw text, handling trailing data."""
-    if not text:
-        return "{}"
-    text = str(text).strip()
 
-    # 1. Try markdown code block: ```json ... ```
-    md_match = re.search(r'```(?:json)?\s*\n?(.*?)\n?```', text, re.DOTALL)
-    if md_match:
-        candidate = md_match.group(1).strip()
-        try:
-            json.loads(candidate)
-            return candidate
-        except (json.JSONDecodeError, ValueError):
-            pass  # fall through to other methods
+def get_llm_rotation(start_index: int, provider: Optional[str] = None, kind: str = "main") -> list:
+    """
+    Return the rotation for `kind` ("main" or "exec"), starting at start_index.
+    The router caches the client objects, so HTTP sessions are reused across steps.
+    """
+    if kind == "exec":
+        return LLMConfig.get_execution_llm_with_rotation(start_index, provider=provider)
+    return LLMConfig.get_main_llm_with_rotation(start_index, provider=provider)
+
 
-    # 2. Try parsing the full text as-is
+@lru_cache(maxsize=64)
+def _fresh_system_message(user_input: str, historical_errors: str, instructions: str) -> str:
+    """Rendered FRESH START planner prompt; repeat goals reuse the same text."""
+    return get_central_agent_prompt5(user_input, historical_errors, instructions)
+
+
+@lru_cache(maxsize=1)
+def _lazy() -> SimpleNamespace:
+    """
+    Import the heavy LangChain agent/Tavily modules on first use rather than at import,
+    so CLI and UI startup don't pay for them before the first plan is made.
+    """
     try:
-        json.loads(text)
-        return text
-    except (json.JSONDecodeError, ValueError):
-        pass
-
-    # 3. Extract the first complete JSON object {...} using brace matching
-    start = text.find('{')
-    if start != -1:
-        depth = 0
-        in_string = False
-        escape_next = False
-        for i in range(start, len(text)):
-            ch = text[i]
-            if escape_next:
-                escape_next = False
-                continue
-            if ch == '\\' and in_string:
-                escape_next = True
-                continue
-            if ch == '"' and not escape_next:
-                in_string = not in_string
-                continue
-            if in_string:
-                continue
-            if ch == '{':
-                depth += 1
-            elif ch == '}':
-                depth -= 1
-                if depth == 0:
-                    candidate = text[start:i + 1]
-                    try:
-                        json.loads(candidate)
-                        return candidate
-                    except (json.JSONDecodeError, ValueError):
-                        break
+        from langchain.agents import AgentExecutor, create_tool_calling_agent
+    except ImportError:
+        # Fallback for newer LangChain versions
+        from langchain_core.agents import AgentExecutor, create_tool_calling_agent
+    try:
+        from langchain_tavily import TavilySearch
+    except ImportError:
+        from langchain_community.tools.tavily_search import TavilySearchResults as TavilySearch
+    return SimpleNamespace(
+        AgentExecutor=AgentExecutor,
+        create_tool_calling_agent=create_tool_calling_agent,
+        TavilySearch=TavilySearch,
+    )
+
+
+@lru_cache(maxsize=1)
+def _get_tavily():
+    """Shared Tavily client (reads TAVILY_API_KEY from environment) so its HTTP session is reused."""
+    return _lazy().TavilySearch(max_results=5)
+
 
-    # 4. Fallback — return as-is (will likely fail at json.loads, but caller handles it)
-    return text
+@lru_cache(maxsize=1)
+def _get_planner_tools() -> tuple:
+    """Planner tool set, built once."""
+    return (_get_tavily(), close_browser)
+
+
+@lru_cache(maxsize=1)
+def _get_executor_tools() -> tuple:
+    """Execution agent tool set, built once - it is invariant across plan steps."""
+    return (
+        _get_tavily(),
+        # Vision & observation
+        observe_page,
+        analyze_using_vision,
+        enable_vision_overlay,
+        find_element_ids,
+        # Smart interaction (finds elements by description)
+        smart_click,
+        smart_type,
+        # Core browser tools
+        click_id,
+        fill_id,
+        scroll_one_screen,
+        press_key,
+        get_page_text,
+        open_browser,
+        scrape_data_using_text,
+        extract_and_analyze_selectors,
+        hover_element,
+        get_visible_input_fields,
+        extract_text_from_selector,
+        extract_attribute_from_selector,
+        select_dropdown_option,
+        open_dropdown_and_select
+    )
 
 
 def get_current_browser_info():
@@ -168,7 +243,7 @@ def central_agent1(state):
     logger.agent_start("Planner", "Generating execution plan")
     
     user_input = state["user_input"]
-    user_input = user_input.replace("{", "{{").replace("}", "}}")
+    user_input = user_input.translate(_BRACE_ESCAPE)
     
     site_names = state.get("site_names", [])
     urls = state.get("urls", [])
@@ -177,49 +252,51 @@ def central_agent1(state):
     last_error = state.get("last_error", None)
     
     logger.info(f"Step Index: {current_index}, Sites: {site_names}, Last Error: {bool(last_error)}", agent="Planner")
-    print(f">>> PLANNING AGENT: Step Index: {current_index}")
+    logger.info(">>> PLANNING AGENT: Step Index: %s", current_index, agent="Planner")
    
     if not site_names:
         historical_errors = "No previous errors"
     else:
         vector_db = get_vector_db()
         historical_errors = retrieve_errors(state) if vector_db else "No previous errors"
-    historical_errors = historical_errors.replace("{", "{{").replace("}", "}}")
+    historical_errors = historical_errors.translate(_BRACE_ESCAPE)
 
     # Scan current page state
-    print(">>> Planner is scanning the page...")
-    if browser_manager.get_page():
+    logger.info(">>> Planner is scanning the page...", agent="Planner")
+    page = browser_manager.get_page()
+    if page:
         try:
-            raw_text = browser_manager.get_page().evaluate("document.body.innerText")[:1000]
-            current_page_state = f"Page Title: {browser_manager.get_page().title()}\nVisible Text Snippet: {raw_text}..."
-        except Exception as e:
+            # One round-trip; the snippet is truncated in the browser so the full text never crosses CDP
+            info = page.evaluate(_PAGE_SNAPSHOT_JS)
+            current_page_state = f"Page Title: {info['title']}\nVisible Text Snippet: {info['text']}..."
+        except (PlaywrightError, AttributeError, KeyError, TypeError) as e:
             logger.debug(f"Could not read page state: {e}", agent="Planner")
             current_page_state = "Browser is open but page content is unreadable."
     else:
         current_page_state = "Browser is NOT open. First step must be 'Open Browser'."
-    current_page_state = current_page_state.replace("{", "{{").replace("}", "}}")
+    current_page_state = current_page_state.translate(_BRACE_ESCAPE)
 
     completed_steps = []
     completed_context_str = ""
     extracted_data_context = ""
     immediate_error_context = ""
+    cached_template = None
     
-    parser = JsonOutputParser(pydantic_object=SupervisorOutput)
-    instructions = parser.get_format_instructions().replace("{", "{{").replace("}", "}}")
+    instructions = _PLANNER_INSTRUCTIONS
 
     # Determine planning mode
     if state.get("output_content") and current_index == 0:
-        print(">>> PLANNER MODE: PHASE 2 (Data Driven Re-planning)")
+        logger.info(">>> PLANNER MODE: PHASE 2 (Data Driven Re-planning)", agent="Planner")
         
         if current_plan:
             completed_context_str = "\n### COMPLETED HISTORY (PHASE 1):\n"
             for step in current_plan:
                 completed_context_str += f"[OK] Step {step['step_number']}: {step['query']} (Agent: {step['agent']})\n"
-        completed_context_str = completed_context_str.replace("{", "{{").replace("}", "}}")
+        completed_context_str = completed_context_str.translate(_BRACE_ESCAPE)
         
         recent_data = state["output_content"][-2:]
         extracted_data_context = f"\n### DATA EXTRACTED SO FAR (Use this to plan Phase 2):\n{str(recent_data)}\n"
-        extracted_data_context = extracted_data_context.replace("{", "{{").replace("}", "}}")
+        extracted_data_context = extracted_data_context.translate(_BRACE_ESCAPE)
         
         completed_steps = []
 
@@ -252,11 +329,11 @@ THE CURRENT PAGE STATE IS:
 """
         
     elif last_error:
-        print(f">>> PLANNER MODE: ERROR RECOVERY (Step {current_index} Failed)")
+        logger.info(">>> PLANNER MODE: ERROR RECOVERY (Step %s Failed)", current_index, agent="Planner")
         
         if current_plan:
             completed_steps = current_plan[:current_index]
-            print(f">>> RETAINING {len(completed_steps)} SUCCESSFUL STEPS.")
+            logger.info(">>> RETAINING %s SUCCESSFUL STEPS.", len(completed_steps), agent="Planner")
         
         completed_context_str = "\nTHE FOLLOWING STEPS ARE ALREADY COMPLETED. DO NOT RE-PLAN THEM:\n"
         for step in completed_steps:
@@ -268,8 +345,8 @@ THE CURRENT PAGE STATE IS:
             f"YOU MUST GENERATE A NEW PLAN STARTING FROM STEP {current_index + 1} THAT FIXES THIS ERROR."
         )
 
-        completed_context_str = completed_context_str.replace("{", "{{").replace("}", "}}")
-        immediate_error_context = immediate_error_context.replace("{", "{{").replace("}", "}}")
+        completed_context_str = completed_context_str.translate(_BRACE_ESCAPE)
+        immediate_error_context = immediate_error_context.translate(_BRACE_ESCAPE)
         
         system_message = f"""
 You are the **Browser Automation Architect**.
@@ -292,14 +369,31 @@ THE CURRENT PAGE STATE IS:
 {instructions}
 """
     else:
-        print(">>> PLANNER MODE: FRESH START")
+        logger.info(">>> PLANNER MODE: FRESH START", agent="Planner")
         completed_steps = []
-        system_message = get_central_agent_prompt5(user_input, historical_errors, instructions)
+        system_message = _fresh_system_message(user_input, historical_errors, instructions)
+        if PLAN_CACHE_ENABLED:
+            cached_template = _lookup_plan_template(state["user_input"])
     
     # LLM rotation
     start_index = state.get("current_model_index", 0)
     provider = state.get("llm_provider", None)
-    llm_rotation = LLMConfig.get_main_llm_with_rotation(start_index, provider=provider)
+    llm_rotation = get_llm_rotation(start_index, provider=provider)
+
+    if cached_template and llm_rotation:
+        adapted = _adapt_plan_template(state["user_input"], cached_template, llm_rotation[0])
+        if adapted:
+            logger.agent_complete("Planner", f"Plan adapted from cache: {len(adapted['steps'])} steps", (_time.time() - _start) * 1000)
+            logger.info(">>> PLAN ADAPTED FROM CACHE. Total Steps: %s", len(adapted['steps']), agent="Planner")
+            return {
+                "plan": adapted["steps"],
+                "step_index": 0,
+                "last_error": None,
+                "urls": adapted["target_urls"],
+                "site_names": adapted["site_names"],
+                "current_model_index": start_index % len(llm_rotation),
+                "messages": [HumanMessage(content=f"[Planner]: Plan adapted from cache. Phase steps: {len(adapted['steps'])}.")]
+            }
     
     prompt = ChatPromptTemplate.from_messages([
         ("system", system_message),
@@ -308,27 +402,24 @@ THE CURRENT PAGE STATE IS:
         MessagesPlaceholder(variable_name="agent_scratchpad")
     ])
 
-    # TavilySearch reads TAVILY_API_KEY from environment automatically
-    tavily = TavilySearch(max_results=5)
-    tools = [tavily, close_browser]
+    m = _lazy()
+    tools = _get_planner_tools()
 
     # Sanitize message history
-    sanitized_history = []
-    for msg in state["messages"]:
-        raw_content = msg.content if msg.content is not None else ""
-        sanitized_content = raw_content.replace("{", "{{").replace("}", "}}")
-        if isinstance(msg, (HumanMessage, AIMessage)):
-            sanitized_history.append(type(msg)(content=sanitized_content))
-        else:
-            sanitized_history.append(HumanMessage(content=sanitized_content))
+    sanitized_history = [
+        (type(msg) if isinstance(msg, _HISTORY_MESSAGE_TYPES) else HumanMessage)(
+            content=(msg.content or "").translate(_BRACE_ESCAPE)
+        )
+        for msg in state["messages"]
+    ]
 
     last_error = None
     for idx, (model_name, current_llm) in enumerate(llm_rotation):
         try:
-            print(f"\n>>> Central Agent trying {model_name} (index {start_index + idx})...")
+            logger.info(">>> Central Agent trying %s (index %s)...", model_name, start_index + idx, agent="Planner")
             
-            agent = create_tool_calling_agent(current_llm, tools, prompt)
-            executor = AgentExecutor(
+            agent = m.create_tool_calling_agent(current_llm, tools, prompt)
+            executor = m.AgentExecutor(
                 agent=agent,
                 tools=tools,
                 verbose=True,
@@ -344,7 +435,7 @@ THE CURRENT PAGE STATE IS:
                 raise ValueError("Planner LLM returned empty output — retrying with next key")
             
             successful_index = (start_index + idx) % len(llm_rotation)
-            print(f">>> [OK] Success with {model_name}")
+            logger.info(">>> [OK] Success with %s", model_name, agent="Planner")
             
             # Parse response
             clean_json = extract_json_from_markdown(raw_output)
@@ -369,24 +460,24 @@ THE CURRENT PAGE STATE IS:
                             page_content=rag_content,
                             metadata={
                                 "url": url, "site_name": site_name,
-                                "type": "error_resolution", "related_step_index": current_index
+                                "type": "error_resolution", "related_step_index": current_index,
+                                "timestamp": time.time()
                             }
                         )
-                        vector_db.add_documents([doc])
-                        print(f">>> SAVED ERROR & SOLUTION TO RAG")
+                        buffer_rag_document(doc)
+                        logger.info(">>> SAVED ERROR & SOLUTION TO RAG", agent="Planner")
                     except Exception as e:
-                        print(f"RAG Save Failed: {e}")
+                        logger.warning("RAG Save Failed: %s", e, agent="Planner")
 
-            # Combine with completed steps
+            # Combine with completed steps (already numbered 1..len(completed_steps))
+            for i, step in enumerate(new_steps, start=len(completed_steps) + 1):
+                step['step_number'] = i
             final_plan = completed_steps + new_steps
-            
-            for i, step in enumerate(final_plan):
-                step['step_number'] = i + 1
 
             logger.agent_complete("Planner", f"Plan generated: {len(new_steps)} new steps, {len(final_plan)} total", (_time.time() - _start) * 1000)
             for s in new_steps:
                 logger.debug(f"  Step {s.get('step_number','?')}: [{s.get('agent','?')}] {s.get('query','?')[:80]}", agent="Planner")
-            print(f">>> PLAN GENERATED. New Steps: {len(new_steps)}, Total Steps: {len(final_plan)}")
+            logger.info(">>> PLAN GENERATED. New Steps: %s, Total Steps: %s", len(new_steps), len(final_plan), agent="Planner")
             
             return {
                 "plan": final_plan,
@@ -399,20 +490,17 @@ THE CURRENT PAGE STATE IS:
             }
             
         except Exception as e:
-            error_str = str(e).lower()
             last_error = str(e)
             
-            if "429" in error_str or "413" in error_str or "403" in error_str or "rate limit" in error_str or "quota" in error_str or "resource_exhausted" in error_str or "request too large" in error_str or "permission" in error_str or "denied" in error_str or "billing" in error_str or "empty output" in error_str or "extra data" in error_str or "expecting value" in error_str or "jsondecodeerror" in error_str or "404" in error_str or "not found" in error_str or "no longer available" in error_str or "does not exist" in error_str or "model_not_found" in error_str or "deprecated" in error_str:
+            if _PLANNER_RETRY_RE.search(last_error):
                 logger.warning(f"Rate limit / model issue on {model_name}: {str(e)[:100]}, rotating...", agent="Planner")
-                print(f">>> [WARN] Transient/model error on {model_name}, rotating to next key...")
                 continue
             else:
                 logger.agent_error("Planner", f"Planning error: {e}")
-                print(f">>> [FAIL] Planning Error (non-rate-limit): {e}")
                 break
 
     # All keys exhausted
-    print(f">>> All API keys exhausted or planning failed. Last error: {last_error}")
+    logger.error(">>> All API keys exhausted or planning failed. Last error: %s", last_error, agent="Planner")
     final_plan = current_plan
 
     return {
@@ -439,6 +527,7 @@ def redirector(state):
         print("Plan execution completed.")
         # Compile output before ending (same logic as "end" step)
         existing_output = state.get("Output", "")
+        captured = True
         if existing_output and existing_output.strip():
             final_output = existing_output
         else:
@@ -449,6 +538,7 @@ def redirector(state):
                 last_msg = state["execution_messages"][-1]
                 final_output = last_msg.content if hasattr(last_msg, 'content') else str(last_msg)
             if not final_output and state.get("messages"):
+                captured = False
                 summaries = []
                 for msg in state["messages"]:
                     content = msg.content if hasattr(msg, 'content') else str(msg)
@@ -456,8 +546,11 @@ def redirector(state):
                         summaries.append(content)
                 final_output = "\n".join(summaries[-3:]) if summaries else "Task completed but no output was captured."
             if not final_output:
+                captured = False
                 final_output = "Task completed successfully."
         print(f">>> END: Final output ({len(final_output)} chars)")
+        if PLAN_CACHE_ENABLED and captured:
+            _store_plan_template(state["user_input"], state.get("first_phase_plan") or plan)
         return Command(goto=END, update={"Output": final_output})
 
     step = plan[index]
@@ -467,13 +560,14 @@ def redirector(state):
     
     if step["agent"] == "PLANNER":
         print(">>> Step is 'PLANNER'. Resetting plan and sending back to Architect.")
-        return Command(
-            update={
-                "step_index": 0,
-                "messages": [HumanMessage(content="Phase 1 complete. Data extracted. Please plan Phase 2.")]
-            },
-            goto="planner"
-        )
+        update = {
+            "step_index": 0,
+            "messages": [HumanMessage(content="Phase 1 complete. Data extracted. Please plan Phase 2.")]
+        }
+        if not state.get("first_phase_plan"):
+            # The plan cache only serves fresh starts, so it stores the first phase
+            update["first_phase_plan"] = plan
+        return Command(update=update, goto="planner")
     elif step["agent"] == "RAG":
         message_content = step.get("rag_message") or step.get("query", "")
         new_msg = HumanMessage(content=message_content)
@@ -489,6 +583,7 @@ def redirector(state):
     elif step["agent"] == "end":
         # Check if Output was already set (e.g. by output_formatting_agent)
         existing_output = state.get("Output", "")
+        captured = True
         
         if existing_output and existing_output.strip():
             # Output already formatted — keep it
@@ -508,6 +603,7 @@ def redirector(state):
             
             # Last resort: summarize from all messages
             if not final_output and state.get("messages"):
+                captured = False
                 summaries = []
                 for msg in state["messages"]:
                     content = msg.content if hasattr(msg, 'content') else str(msg)
@@ -516,9 +612,13 @@ def redirector(state):
                 final_output = "\n".join(summaries[-3:]) if summaries else "Task completed but no output was captured."
             
             if not final_output:
+                captured = False
                 final_output = "Task completed successfully."
         
         print(f">>> END: Final output ({len(final_output)} chars)")
+        # Only runs that produced real output are worth replaying
+        if PLAN_CACHE_ENABLED and captured:
+            _store_plan_template(state["user_input"], state.get("first_phase_plan") or plan)
         return Command(goto=END, update={"step_index": 0, "plan": [], "Output": final_output})
     else:
         error_msg = f"Error at step {index}: Unknown agent {step['agent']}"
@@ -537,56 +637,23 @@ def execution_agent(state):
     task_msg = state["execution_messages"][-1]
     task = task_msg.content if hasattr(task_msg, 'content') else str(task_msg)
     logger.agent_start("Executor", task[:100])
-    task = task.replace("{", "{{").replace("}", "}}")
+    task = task.translate(_BRACE_ESCAPE)
     
-    sanitized_history = []
-    for msg in state["execution_messages"][:-1]:
-        if isinstance(msg, HumanMessage) or isinstance(msg, AIMessage):
-            sanitized_history.append(msg)
-        else:
-            sanitized_history.append(HumanMessage(content=str(msg.content)))
-    
-    # TavilySearch reads TAVILY_API_KEY from environment automatically
-    tavily = TavilySearch(max_results=5)
-    tools = [
-        tavily,
-        # Vision & observation
-        observe_page,
-        analyze_using_vision,
-        enable_vision_overlay,
-        find_element_ids,
-        # Smart interaction (finds elements by description)
-        smart_click,
-        smart_type,
-        # Core browser tools
-        click_id,
-        fill_id,
-        scroll_one_screen,
-        press_key,
-        get_page_text,
-        open_browser,
-        scrape_data_using_text,
-        extract_and_analyze_selectors,
-        hover_element,
-        get_visible_input_fields,
-        extract_text_from_selector,
-        extract_attribute_from_selector,
-        select_dropdown_option,
-        open_dropdown_and_select
-    ]
+    m = _lazy()
+    tools = _get_executor_tools()
     
     start_index = state.get("current_model_index", 0)
     provider = state.get("llm_provider", None)
-    llm_rotation = LLMConfig.get_execution_llm_with_rotation(start_index, provider=provider)
+    llm_rotation = get_llm_rotation(start_index, provider=provider, kind="exec")
     
     last_error = None
     for idx, (model_name, current_llm) in enumerate(llm_rotation):
         try:
             logger.llm_call(model_name.split('/')[0] if '/' in model_name else model_name, model_name, start_index + idx)
-            print(f"\n>>> Execution Agent trying {model_name} (index {start_index + idx})...")
+            logger.info(">>> Execution Agent trying %s (index %s)...", model_name, start_index + idx, agent="Executor")
             
-            agent = create_tool_calling_agent(current_llm, tools, get_autonomous_browser_prompt5())
-            agent_executor = AgentExecutor(
+            agent = m.create_tool_calling_agent(current_llm, tools, get_autonomous_browser_prompt5())
+            agent_executor = m.AgentExecutor(
                 agent=agent,
                 tools=tools,
                 verbose=True,
@@ -595,26 +662,23 @@ def execution_agent(state):
                 return_intermediate_steps=True
             )
 
-            print(f">>> Starting Execution Agent Task {state['step_index']}...")
+            logger.info(">>> Starting Execution Agent Task %s...", state['step_index'], agent="Executor")
             result = agent_executor.invoke({"input": task, "chat_history": []})
             
             successful_index = (start_index + idx) % len(llm_rotation)
             logger.agent_complete("Executor", f"Success with {model_name}", (_time.time() - _start) * 1000)
-            print(f">>> [OK] Success with {model_name}")
+            logger.info(">>> [OK] Success with %s", model_name, agent="Executor")
             
             output_text = result.get("output", "") or ""
-            print("\n>>> FINAL OUTPUT:")
-            output_lower = output_text.lower().strip()
+            logger.info(">>> FINAL OUTPUT:", agent="Executor")
             
             # Only flag as error if the output STARTS with an error indicator
             # or is very short and contains failure words (i.e., the whole output IS the error)
-            is_short_error = len(output_text) < 200 and any(
-                w in output_lower for w in ["unable", "couldn't", "execution failed"]
-            )
-            is_explicit_error = output_lower.startswith("error") or output_lower.startswith("failed")
+            is_short_error = len(output_text) < 200 and _SHORT_FAIL_RE.search(output_text) is not None
+            is_explicit_error = _EXPLICIT_FAIL_RE.match(output_text) is not None
             
-            if (is_short_error or is_explicit_error) and "no error" not in output_lower:
-                print(f"\n>>> Execution Agent Error: Detected failure in output")
+            if (is_short_error or is_explicit_error) and not _NO_ERROR_RE.search(output_text):
+                logger.warning(">>> Execution Agent Error: Detected failure in output", agent="Executor")
                 return Command(
                     update={"last_error": output_text, "current_model_index": successful_index},
                     goto="planner"
@@ -625,17 +689,18 @@ def execution_agent(state):
             update_dict = {"execution_messages": [new_msg], "messages": [new_msg], "current_model_index": successful_index}
             extracted_data = []
             
-            if "intermediate_steps" in result:
-                for action, observation in result["intermediate_steps"]:
-                    # Only capture actual data extraction tools
-                    if action.tool in ["scrape_data_using_text", "analyze_using_vision", "extract_and_analyze_selectors"]:
-                        content = json.dumps(observation) if isinstance(observation, (dict, list)) else str(observation)
-                        # Filter out error responses — don't save tool errors as "extracted data"
-                        content_lower = content.lower()
-                        if "error" in content_lower and ("403" in content_lower or "429" in content_lower or "failed" in content_lower or "denied" in content_lower):
-                            print(f">>> [SKIP] Filtering out error result from {action.tool}")
-                            continue
-                        extracted_data.append(content)
+            # Only capture actual data extraction tools (serialized lazily, one pass over the trace)
+            observations = (
+                (action.tool, json.dumps(observation) if isinstance(observation, (dict, list)) else str(observation))
+                for action, observation in result.get("intermediate_steps", ())
+                if action.tool in _EXTRACT_TOOLS
+            )
+            for tool_name, content in observations:
+                # Filter out error responses — don't save tool errors as "extracted data"
+                if _TOOL_ERROR_RE.search(content) and _TOOL_ERROR_DETAIL_RE.search(content):
+                    logger.info(">>> [SKIP] Filtering out error result from %s", tool_name, agent="Executor")
+                    continue
+                extracted_data.append(content)
 
             # If extraction tools failed but the agent manually extracted data in its output text,
             # use that instead — the agent often reads the page text and formats results itself
@@ -648,22 +713,18 @@ def execution_agent(state):
             return Command(update=update_dict, goto="redirector")
             
         except Exception as e:
-            error_str = str(e).lower()
             last_error = str(e)
             
-            if "429" in error_str or "413" in error_str or "403" in error_str or "rate limit" in error_str or "quota" in error_str or "resource_exhausted" in error_str or "request too large" in error_str or "permission" in error_str or "denied" in error_str or "billing" in error_str or "404" in error_str or "not found" in error_str or "no longer available" in error_str or "deprecated" in error_str:
+            if _MODEL_ISSUE_RE.search(last_error):
                 logger.warning(f"Rate limit / model issue on {model_name}: {str(e)[:100]}, rotating...", agent="Executor")
-                print(f">>> [WARN] Rate limit or model error on {model_name}, rotating to next key...")
                 continue
-            elif "failed to call a function" in error_str or "tool_call" in error_str or "model_not_found" in error_str or "does not exist" in error_str or "invalid function calling" in error_str or "input should be a valid dictionary" in error_str:
+            elif _TOOL_CALL_RETRY_RE.search(last_error):
                 # Tool calling format issue or model unavailable — try next model
                 logger.warning(f"Tool/model error on {model_name}: {str(e)[:150]}, trying next model...", agent="Executor")
-                print(f">>> [WARN] Tool/model error on {model_name}: {str(e)[:200]}")
                 continue
             else:
                 error_msg = f"AGENT CRASHED: {str(e)}"
                 logger.agent_error("Executor", error_msg)
-                print(f"\n>>> {error_msg}")
                 new_msg = ChatMessage(role="execution_agent", content=error_msg)
                 
                 return Command(
@@ -676,7 +737,7 @@ def execution_agent(state):
                     goto="planner"
                 )
 
-    print(f"\n>>> ALL API KEYS EXHAUSTED. Last error: {last_error}")
+    logger.error(">>> ALL API KEYS EXHAUSTED. Last error: %s", last_error, agent="Executor")
     final_msg = ChatMessage(
         role="execution_agent",
         content=f"All API keys exhausted due to rate limits. Last error: {last_error}"
@@ -698,7 +759,7 @@ def output_formatting_agent(state):
     import time as _time
     _start = _time.time()
     logger.agent_start("OutputFormatter", "Formatting extracted data")
-    print(">>> OUTPUT FORMATTING AGENT")
+    logger.info(">>> OUTPUT FORMATTING AGENT", agent="OutputFormatter")
     
     input_message = state["output_agent_messages"][-1]
     if hasattr(input_message, 'content'):
@@ -708,82 +769,153 @@ def output_formatting_agent(state):
     
     content_to_format = state["output_content"] if state["output_content"] else "No content to format."
     
-    prompt = ChatPromptTemplate.from_messages([
-        ("system", "You are a data extraction specialist. \nINSTRUCTIONS:\n{instructions}"),
-        ("human", "RAW DATA:\n{data}")
-    ])
-    
     start_index = state.get("current_model_index", 0)
     provider = state.get("llm_provider", None)
-    llm_rotation = LLMConfig.get_main_llm_with_rotation(start_index, provider=provider)
+    llm_rotation = get_llm_rotation(start_index, provider=provider)
     
+    def _format_with(current_llm):
+        chain = _FORMATTER_PROMPT | current_llm
+        return chain.invoke({"instructions": input_message, "data": content_to_format})
+
+    def _success(result, model_name, idx):
+        formatted_output = result.content
+        successful_index = (start_index + idx) % len(llm_rotation)
+        logger.agent_complete("OutputFormatter", f"Formatted with {model_name}", (_time.time() - _start) * 1000)
+        logger.info(">>> [OK] Success with %s", model_name, agent="OutputFormatter")
+        logger.info(">>> Formatted Output: %s...", formatted_output[:100], agent="OutputFormatter")
+        return Command(
+            update={"Output": formatted_output, "current_model_index": successful_index},
+            goto="redirector"
+        )
+
     last_error = None
-    for idx, (model_name, current_llm) in enumerate(llm_rotation):
-        try:
-            print(f"\n>>> Output Formatting trying {model_name} (index {start_index + idx})...")
-            
-            chain = prompt | current_llm
-            result = chain.invoke({"instructions": input_message, "data": content_to_format})
-            formatted_output = result.content
-    
-            successful_index = (start_index + idx) % len(llm_rotation)
-            logger.agent_complete("OutputFormatter", f"Formatted with {model_name}", (_time.time() - _start) * 1000)
-            print(f">>> [OK] Success with {model_name}")
-            print(f">>> Formatted Output: {formatted_output[:100]}...")
-            
-            return Command(
-                update={"Output": formatted_output, "current_model_index": successful_index},
-                goto="redirector"
-            )
-            
-        except Exception as e:
-            error_str = str(e).lower()
-            last_error = str(e)
-            
-            if "429" in error_str or "rate limit" in error_str or "quota" in error_str or "resource_exhausted" in error_str:
-                print(f">>> [WARN] Rate limit hit on {model_name}, rotating to next key...")
+    hard_failure = False
+
+    # Race the top two candidates and take the first success. Formatting is a pure
+    # text generation with no tool side effects, so duplicate requests are harmless.
+    raced = llm_rotation[:2]
+    logger.info(">>> Output Formatting racing %s (index %s)...", ', '.join(name for name, _ in raced), start_index, agent="OutputFormatter")
+    pool = ThreadPoolExecutor(max_workers=len(raced))
+    try:
+        futures = {pool.submit(_format_with, current_llm): idx for idx, (_, current_llm) in enumerate(raced)}
+        for future in as_completed(futures):
+            idx = futures[future]
+            model_name = raced[idx][0]
+            try:
+                result = future.result()
+            except Exception as e:
+                last_error = str(e)
+                if _RATE_LIMIT_RE.search(last_error):
+                    logger.warning(">>> [WARN] Rate limit hit on %s, rotating to next key...", model_name, agent="OutputFormatter")
+                else:
+                    logger.error(">>> [FAIL] Formatting Error: %s", e, agent="OutputFormatter")
+                    hard_failure = True
                 continue
-            else:
-                print(f">>> [FAIL] Formatting Error: {e}")
+            return _success(result, model_name, idx)
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    # Both raced candidates failed: fall back to serial rotation over the rest
+    if not hard_failure:
+        for idx, (model_name, current_llm) in enumerate(llm_rotation[2:], start=2):
+            try:
+                logger.info(">>> Output Formatting trying %s (index %s)...", model_name, start_index + idx, agent="OutputFormatter")
+                return _success(_format_with(current_llm), model_name, idx)
+            except Exception as e:
+                last_error = str(e)
+                if _RATE_LIMIT_RE.search(last_error):
+                    logger.warning(">>> [WARN] Rate limit hit on %s, rotating to next key...", model_name, agent="OutputFormatter")
+                    continue
+                logger.error(">>> [FAIL] Formatting Error: %s", e, agent="OutputFormatter")
                 break
     
-    print(f">>> Formatting failed. Last error: {last_error}")
+    logger.error(">>> Formatting failed. Last error: %s", last_error, agent="OutputFormatter")
     return Command(
         update={"Output": f"Formatting failed: {last_error}"},
         goto="redirector"
     )
 
 
-# Lazy loading vector DB
-_vector_db_instance = None
+# How many of the newest lessons to show per site. The read is bounded: only lessons
+# from the last LESSON_WINDOW_SECONDS, at most LESSON_SCAN_LIMIT per site, are fetched,
+# and sites left short are topped up by similarity to a fixed error probe.
+ERRORS_PER_SITE = 3
+LESSON_WINDOW_SECONDS = 30 * 24 * 3600
+LESSON_SCAN_LIMIT = 20
+
 
-def get_vector_db():
+def _lookup_plan_template(user_input: str) -> Optional[dict]:
     """
-    Lazy load the vector database only when needed.
-    This eliminates the startup delay from loading HuggingFaceEmbeddings and Chroma.
-    Returns None if ChromaDB dependencies are not installed.
+    Find a cached plan skeleton whose goal is semantically close to user_input.
+    Returns the stored template dict, or None on a miss.
     """
-    global _vector_db_instance
-    
-    if not HAS_CHROMADB:
-        # ChromaDB dependencies not installed (disabled for Python 3.10 compatibility)
+    vector_db = get_vector_db()
+    if not vector_db:
+        return None
+    try:
+        hits = vector_db.similarity_search_with_relevance_scores(
+            user_input, k=1, filter={"type": "plan_template"}
+        )
+    except Exception as e:
+        logger.debug("Plan cache lookup failed: %s", e, agent="Planner")
+        return None
+    if not hits or hits[0][1] < PLAN_CACHE_THRESHOLD:
+        return None
+    doc, score = hits[0]
+    logger.info(">>> PLAN CACHE HIT (similarity %.2f)", score, agent="Planner")
+    try:
+        return json.loads(doc.metadata["plan"])
+    except (KeyError, json.JSONDecodeError):
         return None
-    
-    if _vector_db_instance is None:
-        try:
-            print(">>> Initializing vector database (first use only)...")
-            embeddings = HuggingFaceEmbeddings(model_name="all-MiniLM-L6-v2")
-            _vector_db_instance = Chroma(
-                persist_directory="./rag_data",
-                embedding_function=embeddings,
-                collection_name="agent_memories"
-            )
-            print(">>> Vector database initialized successfully.")
-        except Exception as e:
-            print(f"Error loading vector database: {str(e)}")
-            _vector_db_instance = None
-    
-    return _vector_db_instance
+
+
+def _adapt_plan_template(user_input: str, template: dict, llm_entry) -> Optional[dict]:
+    """
+    Adapt a cached plan skeleton to a new goal with a single lightweight LLM call.
+    Returns {"steps", "target_urls", "site_names"} or None if adaptation failed.
+    """
+    model_name, llm = llm_entry
+    try:
+        chain = _PLAN_ADAPT_PROMPT | llm
+        response = chain.invoke({
+            "instructions": _PLANNER_PARSER.get_format_instructions(),
+            "goal": user_input,
+            "plan": json.dumps(template, indent=2)
+        })
+        # Validated against SupervisorOutput, so every step has the agent and query
+        # the redirector reads
+        result = parse_supervisor_output(response.content)
+        if not result.steps:
+            return None
+        steps = [step.model_dump(exclude_none=True) for step in result.steps]
+        for i, step in enumerate(steps):
+            step["step_number"] = i + 1
+        return {
+            "steps": steps,
+            "target_urls": result.target_urls,
+            "site_names": result.site_names
+        }
+    except Exception as e:
+        logger.warning("Plan cache adaptation failed on %s: %s", model_name, str(e)[:100], agent="Planner")
+        return None
+
+
+def _store_plan_template(user_input: str, plan: List[dict]):
+    """
+    Queue the skeleton of a successfully completed plan (agents + queries only)
+    so similar future goals can skip full planning. The document ID is derived
+    from the goal, so repeating a goal overwrites its template instead of
+    adding another.
+    """
+    if not plan:
+        return
+    skeleton = {"steps": [{"agent": s.get("agent"), "query": s.get("query", "")} for s in plan]}
+    buffer_rag_document(Document(
+        id="plan_template:" + hashlib.blake2b(user_input.encode("utf-8"), digest_size=16).hexdigest(),
+        page_content=user_input,
+        metadata={"type": "plan_template", "plan": json.dumps(skeleton)}
+    ))
+    logger.info(">>> QUEUED PLAN TEMPLATE FOR CACHE", agent="Planner")
 
 
 def rag(state):
@@ -815,13 +947,13 @@ def rag(state):
             "url": url,
             "site_name": site_name,
             "task": task,
-            "agent": agent
+            "agent": agent,
+            "timestamp": time.time()
         }
     )
     
-    vector_db = get_vector_db()
-    if vector_db:
-        vector_db.add_documents([doc])
+    if get_vector_db():
+        buffer_rag_document(doc)
     
     return Command(
         update={"messages": [ChatMessage(role="RAG Agent", content=f"Memory Saved: '{rag_content[:50]}...'")]},
@@ -841,29 +973,59 @@ def retrieve_errors(state):
     if not vector_db:
         return "Vector database not available."
 
-    combined_errors = "PAST ERRORS/LESSONS:\n"
-    found_any = False
-
-    for site in current_sites:
+    # Metadata-only read of each site's recent lessons (no query embedding, no HNSW
+    # walk). Chroma returns rows in insertion order, so sort the bounded read by
+    # timestamp and keep the newest.
+    sites = list(dict.fromkeys(current_sites))
+    since = time.time() - LESSON_WINDOW_SECONDS
+    by_site = {}
+    for site in sites:
+        docs = []
         try:
-            results = vector_db.similarity_search(
-                query="error failure issue fix",
-                k=3,
-                filter={"site_name": site}
+            records = vector_db.get(
+                where={"$and": [{"site_name": site}, {"timestamp": {"$gte": since}}]},
+                limit=LESSON_SCAN_LIMIT,
+                include=["documents", "metadatas"]
             )
-            if results:
-                found_any = True
-                combined_errors += f"\n--- For {site} ---\n"
-                for i, doc in enumerate(results):
-                    prev_task = doc.metadata.get('task', 'General Task')
-                    combined_errors += f"{i+1}. [Task: {prev_task}]: {doc.page_content}\n"
+            docs = list(zip(records["documents"], records["metadatas"]))
         except Exception as e:
-            print(f"Error retrieving for {site}: {e}")
+            print(f"Error retrieving past errors for {site}: {e}")
+        docs.sort(key=lambda d: d[1].get("timestamp", 0.0), reverse=True)
+        del docs[ERRORS_PER_SITE:]
+
+        # Too few recent lessons (older ones may predate timestamps): top up by similarity
+        probe = get_error_probe_vector()
+        if len(docs) < ERRORS_PER_SITE and probe is not None:
+            try:
+                results = vector_db.similarity_search_by_vector(
+                    embedding=probe,
+                    k=ERRORS_PER_SITE,
+                    filter={"site_name": site}
+                )
+            except Exception as e:
+                print(f"Error retrieving past errors for {site}: {e}")
+                results = []
+            for doc in results:
+                if len(docs) < ERRORS_PER_SITE and (doc.page_content, doc.metadata) not in docs:
+                    docs.append((doc.page_content, doc.metadata))
+        by_site[site] = docs
+
+    by_site = {site: docs for site, docs in by_site.items() if docs}
 
-    if not found_any:
+    if not by_site:
         return "No previous errors found for these sites."
+
+    parts = ["PAST ERRORS/LESSONS:\n"]
+    for site in sites:
+        docs = by_site.get(site)
+        if not docs:
+            continue
+        parts.append(f"\n--- For {site} ---\n")
+        for i, (content, meta) in enumerate(docs):
+            prev_task = meta.get('task', 'General Task')
+            parts.append(f"{i+1}. [Task: {prev_task}]: {content}\n")
             
-    return combined_errors
+    return "".join(parts)
 
 
 class AgentState(MessagesState):
@@ -880,6 +1042,7 @@ class AgentState(MessagesState):
     output_agent_messages: Annotated[List[BaseMessage], operator.add]
     output_content: Annotated[List[str], operator.add]
     Output: str
+    first_phase_plan: Optional[List[dict]] = None  # Plan that ran up to the first PLANNER step
     last_error: Optional[str] = None
     current_model_index: int = 0  # Track rotation index
     llm_provider: Optional[str] = None  # Optional provider filter
@@ -942,6 +1105,9 @@ def run_agent(input_str: str, provider: str = None, headless: bool = True):
         "llm_provider": provider  # None = use all providers with rotation
     }
     
+    # Load the embedding model while the first plan is being generated
+    prewarm_vector_db()
+    
     try:
         app = create_agent()
         response = app.invoke(state, config={"recursion_limit": 100})
@@ -977,8 +1143,7 @@ def run_agent(input_str: str, provider: str = None, headless: bool = True):
     finally:
         logger.info("Cleanup: Closing browser...", agent="Main")
         print(">>> CLEANUP: Closing Browser...")
-        if browser_manager.is_browser_open():
-            browser_manager.close_browser()
+        browser_manager.shutdown()
 
 
 if __name__ == "__main__":
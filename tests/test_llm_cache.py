@@ -0,0 +1,107 @@
+"""
+Tests for the file-backed LLMCache: round trips, the background writer,
+the expiry index (index.bin) and its merge between instances.
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+# Add src directory to Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from browser_agent.memory.base import MemoryConfig
+from browser_agent.memory.cache import LLMCache
+
+
+class LLMCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.config = MemoryConfig(persist_directory=self.dir)
+
+    def tearDown(self):
+        shutil.rmtree(self.dir, ignore_errors=True)
+
+    def make_cache(self, ttl_seconds=3600):
+        return LLMCache(self.config, ttl_seconds=ttl_seconds)
+
+    def test_store_retrieve_delete(self):
+        cache = self.make_cache()
+        self.assertTrue(cache.store("prompt", {"answer": 42}))
+        self.assertEqual(cache.retrieve("prompt"), {"answer": 42})
+        cache.flush()
+
+        # A new instance has nothing in memory, so this reads the entry file
+        self.assertEqual(self.make_cache().retrieve("prompt"), {"answer": 42})
+
+        self.assertTrue(cache.delete("prompt"))
+        cache.flush()
+        self.assertIsNone(cache.retrieve("prompt"))
+        self.assertIsNone(self.make_cache().retrieve("prompt"))
+
+    def test_retrieve_queued_write_before_flush(self):
+        cache = self.make_cache()
+        # Holding the I/O lock keeps the writer thread from draining the queue
+        with cache._io_lock:
+            cache.store("prompt", "queued")
+            cache._mem.clear()
+            self.assertEqual(cache.retrieve("prompt"), "queued")
+            self.assertEqual(os.listdir(cache.cache_dir), [])
+        cache.flush()
+        self.assertEqual(self.make_cache().retrieve("prompt"), "queued")
+
+    def test_clear_expired_with_mixed_ttls(self):
+        expiring = self.make_cache(ttl_seconds=0)
+        lasting = self.make_cache(ttl_seconds=3600)
+        lasting.store("kept", "a")
+        lasting.flush()
+        expiring.store("expired", "b")
+        expiring.flush()
+
+        # Each entry expires by the TTL it was written with, not the clearing instance's
+        self.assertEqual(expiring.clear_expired(), 1)
+        self.assertEqual(lasting.clear_expired(), 0)
+
+        fresh = self.make_cache()
+        self.assertEqual(fresh.retrieve("kept"), "a")
+        self.assertIsNone(fresh.retrieve("expired"))
+
+    def test_rebuild_after_corrupt_index(self):
+        cache = self.make_cache(ttl_seconds=0)
+        lasting = self.make_cache()
+        cache.store("expired", "a")
+        lasting.store("kept", "b")
+        cache.flush()
+        lasting.flush()
+
+        with open(os.path.join(cache.cache_dir, "index.bin"), "wb") as f:
+            f.write(b"not an index")
+        legacy = os.path.join(cache.cache_dir, "0123456789abcdef0123456789abcdef.json")
+        with open(legacy, "wb") as f:
+            f.write(b"{}")
+
+        rebuilt = self.make_cache()
+        self.assertFalse(os.path.exists(legacy))
+        self.assertEqual(rebuilt.retrieve("kept"), "b")
+        # Expiry is recovered from each entry's own timestamp and ttl
+        self.assertEqual(rebuilt.clear_expired(), 1)
+        self.assertEqual(self.make_cache().retrieve("kept"), "b")
+
+    def test_index_merge_between_instances(self):
+        first = self.make_cache(ttl_seconds=0)
+        second = self.make_cache(ttl_seconds=0)
+        first.store("one", 1)
+        first.flush()
+        second.store("two", 2)
+        second.flush()
+
+        # clear_expired only consults index.bin, so both entries must have been merged into it
+        self.assertEqual(self.make_cache().clear_expired(), 2)
+        self.assertEqual(os.listdir(first.cache_dir), ["index.bin"])
+
+
+if __name__ == "__main__":
+    unittest.main()